@@ -1,9 +1,15 @@
 """Configuration Wrapping Framework - Declarative YAML specs for wrapping executables."""
 
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
 __version__ = "0.1.0"
 
-from .core import dry_run, execute, load_spec
-from .models import Injector, Provider, Spec, Stream, Target
+if TYPE_CHECKING:
+    from .core import dry_run, execute, load_spec
+    from .models import Injector, Provider, Spec, Stream, Target
 
 __all__ = [
     "Spec",
@@ -15,3 +21,29 @@ __all__ = [
     "dry_run",
     "execute",
 ]
+
+# Public names are imported on first access (PEP 562) so that importing the
+# package, or a lightweight submodule, does not pull in pydantic and PyYAML.
+_LAZY_ATTRS = {
+    "Spec": ".models",
+    "Provider": ".models",
+    "Injector": ".models",
+    "Target": ".models",
+    "Stream": ".models",
+    "load_spec": ".core",
+    "dry_run": ".core",
+    "execute": ".core",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -2,18 +2,19 @@
 
 from __future__ import annotations
 
-import contextlib
+import functools
+import json
 import sys
 from pathlib import Path  # noqa: TC003
 from typing import Any
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
 
-from .core import build_runtime_context, dry_run, execute, load_spec
+from .core import _plan, build_runtime_context, dry_run, execute, load_spec
+from .models import Spec
 from .streams import StreamWriter, prepare_stream
+from .validation import semantic_validate
 
 app = typer.Typer(help="Configuration Wrapping Framework")
 console = Console()
@@ -92,8 +93,6 @@ def run(
 
         # Perform validation if strict mode is enabled
         if strict:
-            from .validation import semantic_validate
-
             semantic_errors = semantic_validate(spec, strict=True)
             if semantic_errors:
                 console.print("[red]Strict validation failed:[/red]")
@@ -112,14 +111,18 @@ def run(
                 sys.exit(1)
 
             if json_output:
-                import json
-
-                console.print(json.dumps(report.json_summary, indent=2))
+                _write_raw(json.dumps(report.json_summary, indent=2))
             else:
                 if not quiet:
-                    console.print(Panel(report.text_summary, title="Dry Run Report"))
+                    from rich.panel import Panel
+                    from rich.text import Text
+
+                    console.print(
+                        Panel(Text(report.text_summary), title="Dry Run Report"),
+                        highlight=False,
+                    )
                 elif verbose:
-                    console.print(report.text_summary)
+                    console.print(report.text_summary, markup=False, highlight=False)
         else:
             if json_output and not quiet:
                 console.print(
@@ -181,8 +184,6 @@ def validate(
         if verbose and not quiet:
             console.print("[blue]Performing semantic validation...[/blue]")
 
-        from .validation import semantic_validate
-
         semantic_errors = semantic_validate(spec, strict=strict)
 
         if semantic_errors:
@@ -244,42 +245,30 @@ def explain(
 @app.command()
 def print_schema() -> None:
     """Print the JSON schema for specifications."""
-    from .models import Spec
+    _write_raw(_spec_schema_json())
+
+
+def _write_raw(text: str) -> None:
+    """Write text straight to stdout, bypassing Rich markup and highlighting."""
+    sys.stdout.write(text)
+    sys.stdout.write("\n")
 
-    # Generate schema
-    schema = Spec.model_json_schema()
 
-    import json
+@functools.lru_cache(maxsize=1)
+def _spec_schema_json() -> str:
+    """Return the rendered JSON schema for specifications.
 
-    console.print(json.dumps(schema, indent=2))
+    The schema is invariant for the lifetime of the process, so it is generated
+    once and reused.
+    """
+    return json.dumps(Spec.model_json_schema(), indent=2)
 
 
 def _execute_spec(
     spec: Any, context: Any, verbose: bool = False, quiet: bool = False
 ) -> None:
     """Execute a specification."""
-    from .injectors import resolve_injector
-    from .providers import load_providers
-    from .token_engine import TokenEngine
-
-    # Load providers
-    providers = load_providers(spec, context)
-
-    # Create token engine
-    token_engine = TokenEngine(context, providers)
-
-    # Resolve injectors
-    resolved = []
-    for injector in spec.configuration_injectors:
-        resolved_inj = resolve_injector(
-            injector, context, providers, token_engine, spec
-        )
-        resolved.append(resolved_inj)
-
-    # Build final result
-    from .core import build_env_and_argv
-
-    build = build_env_and_argv(spec, resolved, context, token_engine)
+    providers, resolved, build, token_engine = _plan(spec, context)
 
     # Check for errors
     if build.errors:
@@ -318,17 +307,14 @@ def _execute_spec(
             sys.exit(result.exit_code)
 
     finally:
-        # Clean up
+        # Clean up (temporary files are removed by execute itself)
         streams.close()
 
-        # Clean up temporary files
-        for file_path in build.files:
-            with contextlib.suppress(Exception):
-                file_path.unlink(missing_ok=True)
-
 
 def _display_explanation(spec: Any, report: Any) -> None:
     """Display detailed explanation of a specification."""
+    from rich.table import Table
+
     # Providers table
     providers_table = Table(title="Configuration Providers")
     providers_table.add_column("ID", style="cyan")
@@ -2,17 +2,30 @@
 
 from __future__ import annotations
 
+import contextlib
+import copy
+import operator
 import os
+import selectors
 import subprocess
+import time
 from dataclasses import dataclass
-from datetime import datetime
+from functools import cache, lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-import yaml
-
+from .injectors import ResolvedInjector, build_eval_context, resolve_injector
 from .models import Spec
-from .types import Argv, EnvMap, Errors, ProviderMaps, RuntimeContext
+from .token_engine import TokenEngine
+from .types import (
+    MASKED_VALUE,
+    Argv,
+    Errors,
+    ProviderMaps,
+    RuntimeContext,
+    compile_masker,
+    unmasked,
+)
 
 # Export RuntimeContext for other modules
 __all__ = [
@@ -28,18 +41,32 @@ __all__ = [
 ]
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Callable, Iterable, Mapping, Sequence
 
-    from .injectors import ResolvedInjector
     from .streams import StreamWriter
-    from .token_engine import TokenEngine
+
+# Read size for child process pipes; matches the default Linux pipe capacity
+_PIPE_CHUNK_SIZE = 65536
+
+# Process id for runtime contexts, refreshed in forked children
+_PID = os.getpid()
+
+
+def _refresh_pid() -> None:
+    """Update the cached pid in a newly forked child."""
+    global _PID
+    _PID = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_refresh_pid)
 
 
 @dataclass
 class BuildResult:
     """Result of building environment and argv."""
 
-    env: EnvMap
+    env: Mapping[str, str]
     argv: Argv
     stdin_data: bytes | None
     files: list[Path]
@@ -68,112 +95,157 @@ class DryRunReport:
 
 
 def load_spec(path: Path) -> Spec:
-    """Load YAML specification from file."""
-    data = yaml.safe_load(path.read_text())
-    return Spec(**data)
+    """Load YAML specification from file.
+
+    Parsed specs are cached by path, modification time and size, so repeated
+    loads of an unchanged file skip YAML parsing and model validation. A deep
+    copy is returned so callers can freely mutate the spec.
+    """
+    st = path.stat()
+    return copy.deepcopy(
+        _parse_spec_cached(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    )
+
+
+@lru_cache(maxsize=64)
+def _parse_spec_cached(path: str, _mtime_ns: int, _size: int) -> Spec:
+    """Parse and validate a spec file; cached by ``load_spec``."""
+    import yaml
+
+    # Prefer the libyaml-backed loader when PyYAML was built with it, and let
+    # it stream from a buffered handle instead of an in-memory copy of the file
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "rb", buffering=65536) as f:
+        return Spec(**yaml.load(f, Loader=loader))
 
 
-def build_runtime_context(*, env: EnvMap | None = None, seq: int = 1) -> RuntimeContext:
-    """Build runtime context for token expansion."""
+def build_runtime_context(
+    *, env: Mapping[str, str] | None = None, seq: int = 1
+) -> RuntimeContext:
+    """Build runtime context for token expansion.
+
+    Without an explicit ``env`` the context reads ``os.environ`` directly;
+    it is only copied once something needs to modify it. The timestamp for
+    ``DATE``/``TIME`` tokens is captured the first time one is expanded.
+    """
     if env is None:
-        env = dict(os.environ)
+        env = os.environ
 
     return RuntimeContext(
         env=env,
-        now=datetime.now(),
-        pid=os.getpid(),
-        home=str(Path.home()),
+        now=None,
+        pid=_PID,
+        home=_home_dir(),
         seq=seq,
     )
 
 
+@cache
+def _home_dir() -> str:
+    """Return the user's home directory, resolved once per process.
+
+    Unlike the pid this is resolved on first use rather than at import, as
+    it may need a password database lookup.
+    """
+    return str(Path.home())
+
+
 def build_env_and_argv(
     spec: Spec,
     resolved: Sequence[ResolvedInjector],
     context: RuntimeContext,
     token_engine: TokenEngine | None = None,
+    *,
+    providers: ProviderMaps | None = None,
 ) -> BuildResult:
-    """Build final environment and argv from resolved injectors."""
-
-    env = context.env.copy() if spec.env_passthrough else {}
-
-    # Create alias tokens mapping for file injectors
-    alias_tokens = {}
-    for resolved_inj in resolved:
-        if resolved_inj.injector.kind == "file" and resolved_inj.files_created:
-            for alias in resolved_inj.injector.aliases:
-                alias_tokens[alias] = str(resolved_inj.files_created[0])
-
-    # Create token engine with alias tokens if not provided
-    if token_engine is None:
-        from .providers import load_providers
-        from .token_engine import TokenEngine
+    """Build final environment and argv from resolved injectors.
 
-        providers = load_providers(spec, context)
-        token_engine = TokenEngine(context, providers, alias_tokens)
-    else:
-        # Add alias tokens to existing token engine
-        token_engine.alias_tokens.update(alias_tokens)
+    Callers that have already loaded providers should pass their
+    ``token_engine`` (or at least the loaded ``providers``) so providers are
+    not loaded a second time; a given token engine is only augmented with
+    the file alias tokens.
+    """
 
-    # Expand tokens in command if token_engine is provided
-    if token_engine:
-        argv = [token_engine.expand(arg) for arg in spec.target.command]
-    else:
-        argv = spec.target.command.copy()
+    env = context.env if spec.env_passthrough else {}
 
-    stdin_data = None
+    stdin_parts: list[str] = []
     files = []
     errors = []
+    # Arguments from named and file injectors, appended after the command
+    injected_argv: list[str] = []
+    # Positional injectors are appended after everything else, in order
+    positionals: list[ResolvedInjector] = []
+    # File paths exposed as ${alias} tokens for the command
+    alias_tokens = {}
 
-    # Collect positional injectors to be appended at the end
-    positionals = [
-        (r, r.injector.order or 0) for r in resolved if r.injector.kind == "positional"
-    ]
-    positionals.sort(key=lambda x: x[1])  # Sort by order
-
-    # Process other injectors
     for resolved_inj in resolved:
-        if resolved_inj.injector.kind == "positional":
-            continue  # Handle positionals separately
-
         if resolved_inj.skipped:
             continue
 
+        kind = resolved_inj.injector.kind
+
+        # Defer positionals until all other injectors are applied
+        if kind == "positional":
+            positionals.append(resolved_inj)
+            continue
+
         # Handle environment variables
-        if resolved_inj.injector.kind == "env_var":
+        if kind == "env_var":
+            if env is context.env:
+                # Copy the inherited environment only once it is modified
+                env = dict(env)
             for alias in resolved_inj.applied_aliases:
                 env[alias] = resolved_inj.value or ""
 
         # Handle named arguments
-        elif resolved_inj.injector.kind == "named":
-            argv.extend(resolved_inj.argv_segments)
+        elif kind == "named":
+            injected_argv.extend(resolved_inj.argv_segments)
 
         # Handle file creation
-        elif resolved_inj.injector.kind == "file":
+        elif kind == "file":
             if resolved_inj.files_created:
                 files.extend(resolved_inj.files_created)
+                file_path = str(resolved_inj.files_created[0])
+                for alias in resolved_inj.injector.aliases:
+                    alias_tokens[alias] = file_path
             # Add file arguments to argv
-            argv.extend(resolved_inj.argv_segments)
+            injected_argv.extend(resolved_inj.argv_segments)
 
         # Handle stdin fragments
-        elif resolved_inj.injector.kind == "stdin_fragment" and resolved_inj.value:
-            if stdin_data is None:
-                stdin_data = b""
-            stdin_data += resolved_inj.value.encode("utf-8")
+        elif kind == "stdin_fragment" and resolved_inj.value:
+            stdin_parts.append(resolved_inj.value)
 
         # Collect errors
         errors.extend(resolved_inj.errors)
 
+    # Create token engine with alias tokens if not provided
+    if token_engine is None:
+        if providers is None:
+            # Imported lazily: providers probes for the optional Bitwarden SDK
+            from .providers import load_providers
+
+            providers = load_providers(spec, context)
+        token_engine = TokenEngine(context, providers, alias_tokens)
+    else:
+        # Add alias tokens to existing token engine
+        if alias_tokens:
+            token_engine.alias_tokens.update(alias_tokens)
+            token_engine.clear_cache()
+
+    # Expand tokens in command
+    argv = token_engine.expand_many(spec.target.command)
+    argv.extend(injected_argv)
+
     # Append positional injectors in order
-    for resolved_inj, _ in positionals:
-        if not resolved_inj.skipped:
-            argv.extend(resolved_inj.argv_segments)
-            errors.extend(resolved_inj.errors)
+    positionals.sort(key=lambda r: r.injector.order or 0)
+    for resolved_inj in positionals:
+        argv.extend(resolved_inj.argv_segments)
+        errors.extend(resolved_inj.errors)
 
     return BuildResult(
         env=env,
         argv=argv,
-        stdin_data=stdin_data,
+        stdin_data="".join(stdin_parts).encode("utf-8") if stdin_parts else None,
         files=files,
         errors=errors,
     )
@@ -187,19 +259,15 @@ def execute(
     context: RuntimeContext | None = None,
 ) -> ExecutionResult:
     """Execute the target command with the built environment and argv."""
-    import time
-
     # Increment sequence counter if context is provided
     if context:
         context.seq += 1
 
     # Register sensitive values for masking
     if resolved:
-        sensitive_values = []
-        for r in resolved:
-            if r.is_sensitive and r.value:
-                sensitive_values.append(r.value)
-        streams.register_sensitive_values(sensitive_values)
+        sensitive_values = [r.value for r in resolved if r.is_sensitive and r.value]
+        if sensitive_values:
+            streams.register_sensitive_values(sensitive_values)
 
     # Change to working directory
     working_dir = Path(spec.target.working_dir)
@@ -214,53 +282,36 @@ def execute(
     start_time = time.time()
 
     # Execute the command
+    process = None
     try:
         process = subprocess.Popen(
             build.argv,
             cwd=working_dir,
             env=build.env,
             stdin=stdin_pipe,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            # Output that is not forwarded anywhere goes straight to
+            # /dev/null rather than being read and discarded
+            stdout=subprocess.PIPE if streams.forwards_stdout else subprocess.DEVNULL,
+            stderr=subprocess.PIPE if streams.forwards_stderr else subprocess.DEVNULL,
             text=False,  # Use bytes for better stream handling
         )
 
-        # Send stdin data if provided
+        # Small stdin payloads fit in the pipe buffer and can be written up
+        # front; larger ones are fed alongside output draining to avoid
+        # deadlocking against a child that is blocked writing its output.
+        pending_stdin = None
         if build.stdin_data and stdin_pipe and process.stdin:
-            process.stdin.write(build.stdin_data)
-            process.stdin.close()
-
-        # Read output streams
-        stdout_data = b""
-        stderr_data = b""
-
-        while True:
-            stdout_chunk = process.stdout.read(4096) if process.stdout else b""
-            stderr_chunk = process.stderr.read(4096) if process.stderr else b""
-
-            if stdout_chunk:
-                stdout_data += stdout_chunk
-                streams.write_stdout(stdout_chunk)
-
-            if stderr_chunk:
-                stderr_data += stderr_chunk
-                streams.write_stderr(stderr_chunk)
-
-            # Check if process has finished
-            if process.poll() is not None:
-                # Read any remaining output
-                remaining_stdout = process.stdout.read() if process.stdout else b""
-                remaining_stderr = process.stderr.read() if process.stderr else b""
-
-                if remaining_stdout:
-                    stdout_data += remaining_stdout
-                    streams.write_stdout(remaining_stdout)
-
-                if remaining_stderr:
-                    stderr_data += remaining_stderr
-                    streams.write_stderr(remaining_stderr)
+            if len(build.stdin_data) < _PIPE_CHUNK_SIZE:
+                # A child that exits without reading stdin is not an error
+                with contextlib.suppress(BrokenPipeError):
+                    process.stdin.write(build.stdin_data)
+                with contextlib.suppress(BrokenPipeError):
+                    process.stdin.close()
+            else:
+                pending_stdin = build.stdin_data
 
-                break
+        # Forward output streams as data arrives
+        _drain_output(process, streams, pending_stdin)
 
         # Wait for process to complete
         exit_code = process.wait()
@@ -268,16 +319,19 @@ def execute(
     except Exception as e:
         # Handle execution errors
         exit_code = 1
-        error_msg = f"Execution failed: {e}"
-        stderr_data = error_msg.encode("utf-8")
-        streams.write_stderr(stderr_data)
+        streams.write_stderr(f"Execution failed: {e}".encode())
 
     finally:
         # Close process streams
-        if process.stdout:
-            process.stdout.close()
-        if process.stderr:
-            process.stderr.close()
+        if process is not None:
+            if process.stdout:
+                process.stdout.close()
+            if process.stderr:
+                process.stderr.close()
+
+        # Clean up temporary files created by file injectors
+        if resolved:
+            _cleanup_files(path for r in resolved for path in r.files_created)
 
     # Calculate duration
     duration_s = time.time() - start_time
@@ -294,16 +348,6 @@ def execute(
         else None
     )
 
-    # Clean up temporary files created by file injectors
-    if resolved:
-        import contextlib
-
-        for r in resolved:
-            if hasattr(r, "files_created") and r.files_created:
-                for file_path in r.files_created:
-                    with contextlib.suppress(Exception):
-                        file_path.unlink(missing_ok=True)
-
     return ExecutionResult(
         exit_code=exit_code,
         duration_s=duration_s,
@@ -312,55 +356,172 @@ def execute(
     )
 
 
+def _cleanup_files(paths: Iterable[Path]) -> None:
+    """Delete temporary files, ignoring any that are already gone."""
+    unlink = os.unlink
+    for path in paths:
+        # Already removed, or not ours to remove; keep going
+        with contextlib.suppress(OSError):
+            unlink(path)
+
+
+def _drain_output(
+    process: subprocess.Popen[bytes],
+    streams: StreamWriter,
+    stdin_data: bytes | None = None,
+) -> None:
+    """Forward the child's stdout and stderr to the stream writer until EOF.
+
+    Both pipes are multiplexed through a selector so that a child writing only
+    to one stream never blocks forwarding of the other. If ``stdin_data`` is
+    given it is written to the child's stdin from the same loop as the pipe
+    becomes writable, and stdin is closed once it has been fully sent.
+    """
+    writers = {}
+    if process.stdout:
+        writers[process.stdout.fileno()] = streams.write_stdout
+    if process.stderr:
+        writers[process.stderr.fileno()] = streams.write_stderr
+
+    with selectors.DefaultSelector() as selector:
+        for fd, writer in writers.items():
+            os.set_blocking(fd, False)
+            selector.register(fd, selectors.EVENT_READ, writer)
+
+        stdin_view = memoryview(stdin_data or b"")
+        stdin_offset = 0
+        if stdin_data and process.stdin:
+            os.set_blocking(process.stdin.fileno(), False)
+            selector.register(process.stdin, selectors.EVENT_WRITE)
+
+        while selector.get_map():
+            for key, _ in selector.select():
+                if key.fileobj is process.stdin:
+                    try:
+                        stdin_offset += os.write(
+                            key.fd,
+                            stdin_view[stdin_offset : stdin_offset + _PIPE_CHUNK_SIZE],
+                        )
+                    except BlockingIOError:
+                        continue
+                    except BrokenPipeError:
+                        # The child exited without consuming all of its input
+                        stdin_offset = len(stdin_view)
+                    if stdin_offset >= len(stdin_view):
+                        selector.unregister(process.stdin)
+                        process.stdin.close()
+                    continue
+
+                try:
+                    chunk = os.read(key.fd, _PIPE_CHUNK_SIZE)
+                except BlockingIOError:
+                    continue
+                if chunk:
+                    key.data(chunk)
+                else:
+                    selector.unregister(key.fd)
+
+
 def dry_run(spec: Spec, context: RuntimeContext) -> DryRunReport:
     """Perform a dry run to show what would be executed."""
-    from .injectors import resolve_injector
-    from .providers import load_providers
-    from .token_engine import TokenEngine
-
     # Increment sequence counter
     context.seq += 1
 
+    providers, resolved, build, _ = _plan(spec, context)
+
+    # Generate summaries, counting provider keys and masking the command
+    # line once for both
+    key_counts = _provider_key_counts(providers)
+    mask = _sensitive_masker(resolved)
+    masked_argv = _mask_argv(build.argv, mask)
+    text_summary = _generate_text_summary(
+        key_counts, resolved, build, mask, masked_argv
+    )
+    json_summary = _generate_json_summary(
+        spec, key_counts, resolved, build, mask, masked_argv
+    )
+
+    return DryRunReport(
+        providers=providers,
+        resolved=resolved,
+        build=build,
+        text_summary=text_summary,
+        json_summary=json_summary,
+    )
+
+
+def _plan(
+    spec: Spec, context: RuntimeContext
+) -> tuple[ProviderMaps, list[ResolvedInjector], BuildResult, TokenEngine]:
+    """Load providers, resolve injectors and build the final invocation.
+
+    Shared by ``dry_run`` and the CLI's execution path so both do the work
+    exactly once.
+    """
+    # Imported lazily: providers probes for the optional Bitwarden SDK
+    from .providers import load_providers
+
     # Load providers
     providers = load_providers(spec, context)
 
     # Create token engine
     token_engine = TokenEngine(context, providers)
 
+    # Variables for 'when' conditions, flattened once for all injectors
+    eval_context = (
+        build_eval_context(context, providers)
+        if any(injector.when for injector in spec.configuration_injectors)
+        else None
+    )
+
     # Resolve injectors
-    resolved = []
-    for injector in spec.configuration_injectors:
-        resolved_inj = resolve_injector(
-            injector, context, providers, token_engine, spec
-        )
-        resolved.append(resolved_inj)
+    resolved = [
+        resolve_injector(injector, context, providers, token_engine, spec, eval_context)
+        for injector in spec.configuration_injectors
+    ]
 
     # Build final result
     build = build_env_and_argv(spec, resolved, context, token_engine)
 
-    # Generate summaries
-    text_summary = _generate_text_summary(providers, resolved, build)
-    json_summary = _generate_json_summary(spec, providers, resolved, build)
+    return providers, resolved, build, token_engine
 
-    return DryRunReport(
-        providers=providers,
-        resolved=resolved,
-        build=build,
-        text_summary=text_summary,
-        json_summary=json_summary,
-    )
+
+def _sensitive_masker(resolved: Sequence[ResolvedInjector]) -> Callable[[str], str]:
+    """Return a function that masks every sensitive injector value in a string.
+
+    This is ``unmasked`` when no resolved injector has a sensitive value.
+    """
+    return compile_masker(r.value for r in resolved if r.is_sensitive and r.value)
+
+
+def _mask_argv(argv: list[str], mask: Callable[[str], str]) -> list[str]:
+    """Mask sensitive values in each argument; ``argv`` is reused if none."""
+    if mask is unmasked:
+        return argv
+    return [mask(arg) for arg in argv]
+
+
+def _provider_key_counts(providers: ProviderMaps) -> dict[str, tuple[int, int]]:
+    """Return ``(key_count, masked_count)`` for each provider."""
+    return {
+        provider_id: (
+            len(provider_map),
+            operator.countOf(provider_map.values(), MASKED_VALUE),
+        )
+        for provider_id, provider_map in providers.items()
+    }
 
 
 def _generate_text_summary(
-    providers: ProviderMaps,
+    key_counts: dict[str, tuple[int, int]],
     resolved: Sequence[ResolvedInjector],
     build: BuildResult,
+    mask: Callable[[str], str],
+    masked_argv: list[str],
 ) -> str:
     """Generate a text summary of the dry run."""
-    from .types import MASKED_VALUE
-
     lines = []
-    if providers:
+    if key_counts:
         lines.append("Providers Loaded")
     lines.append("Configuration Summary")
     lines.append("=" * 50)
@@ -368,14 +529,11 @@ def _generate_text_summary(
 
     # Providers
     lines.append("Providers:")
-    for provider_id, provider_map in providers.items():
-        masked_count = sum(1 for v in provider_map.values() if v == MASKED_VALUE)
+    for provider_id, (key_count, masked_count) in key_counts.items():
         if masked_count > 0:
-            lines.append(
-                f"  {provider_id}: {len(provider_map)} keys (masked: {masked_count})"
-            )
+            lines.append(f"  {provider_id}: {key_count} keys (masked: {masked_count})")
         else:
-            lines.append(f"  {provider_id}: {len(provider_map)} keys")
+            lines.append(f"  {provider_id}: {key_count} keys")
     lines.append("")
 
     # Injectors
@@ -384,21 +542,8 @@ def _generate_text_summary(
     for r in resolved:
         status = "SKIPPED" if r.skipped else "ACTIVE"
         if r.value is not None:
-            # Mask sensitive values
-            display_value = r.value
-            if r.is_sensitive:
-                display_value = MASKED_VALUE
-            else:
-                # Check if this value contains any sensitive values from other injectors
-                for other_r in resolved:
-                    if (
-                        other_r.is_sensitive
-                        and other_r.value
-                        and other_r.value in display_value
-                    ):
-                        display_value = display_value.replace(
-                            other_r.value, MASKED_VALUE
-                        )
+            # Mask sensitive values, including ones embedded in other values
+            display_value = MASKED_VALUE if r.is_sensitive else mask(r.value)
             lines.append(f"  {r.name}: {status} = {display_value}")
         else:
             lines.append(f"  {r.name}: {status}")
@@ -411,14 +556,6 @@ def _generate_text_summary(
     lines.append("Final Invocation")
     lines.append(f"Working directory: {build.env.get('PWD', '') or ''}")
 
-    # Mask sensitive values in command line
-    masked_argv = build.argv.copy()
-    for r in resolved:
-        if r.is_sensitive and r.value:
-            for i, arg in enumerate(masked_argv):
-                if r.value in arg:
-                    masked_argv[i] = arg.replace(r.value, MASKED_VALUE)
-
     lines.append(f"Command: {' '.join(masked_argv)}")
     lines.append(f"Environment: {len(build.env)} variables")
     lines.append("")
@@ -442,13 +579,13 @@ def _generate_text_summary(
 
 def _generate_json_summary(
     spec: Spec,
-    providers: ProviderMaps,
+    key_counts: dict[str, tuple[int, int]],
     resolved: Sequence[ResolvedInjector],
     build: BuildResult,
+    mask: Callable[[str], str],
+    masked_argv: list[str],
 ) -> dict[str, Any]:
     """Generate a JSON summary of the dry run."""
-    from .types import MASKED_VALUE
-
     return {
         "spec": {
             "version": spec.version,
@@ -456,13 +593,8 @@ def _generate_json_summary(
             "command": spec.target.command,
         },
         "providers": {
-            provider_id: {
-                "key_count": len(provider_map),
-                "masked_count": sum(
-                    1 for v in provider_map.values() if v == MASKED_VALUE
-                ),
-            }
-            for provider_id, provider_map in providers.items()
+            provider_id: {"key_count": key_count, "masked_count": masked_count}
+            for provider_id, (key_count, masked_count) in key_counts.items()
         },
         "injections": [
             {
@@ -470,7 +602,11 @@ def _generate_json_summary(
                 "kind": r.injector.kind,
                 "skipped": r.skipped,
                 "sensitive": r.is_sensitive,
-                "value": MASKED_VALUE if r.is_sensitive and r.value else r.value,
+                "value": (
+                    (MASKED_VALUE if r.is_sensitive else mask(r.value))
+                    if r.value
+                    else r.value
+                ),
                 "resolved": not r.skipped,
                 "errors": r.errors,
             }
@@ -479,7 +615,7 @@ def _generate_json_summary(
         ],
         "build": {
             "env_count": len(build.env),
-            "argv": build.argv,
+            "argv": masked_argv,
             "file_count": len(build.files),
             "error_count": len(build.errors),
             "env_keys": list(build.env.keys()),
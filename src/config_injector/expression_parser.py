@@ -12,14 +12,18 @@ This module provides a proper expression parser that supports:
 
 from __future__ import annotations
 
+import contextlib
 import operator
 import re
+import sys
+import weakref
 from dataclasses import dataclass
 from enum import Enum
-from typing import TYPE_CHECKING, Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, TypeVar
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable, Iterator
 
 
 class TokenType(Enum):
@@ -36,7 +40,7 @@ class TokenType(Enum):
     EOF = "EOF"
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     """A token in the expression."""
 
@@ -82,196 +86,122 @@ class ExpressionLexer:
 
     def tokenize(self) -> list[Token]:
         """Tokenize the expression into a list of tokens."""
-        self.tokens = []
-        self.position = 0
-
-        while self.position < len(self.expression):
-            self._skip_whitespace()
-
-            if self.position >= len(self.expression):
-                break
-
-            char = self.expression[self.position]
-
-            # String literals
-            if char in ('"', "'"):
-                self._read_string(char)
-            # Numbers
-            elif char.isdigit() or (char == "-" and self._peek().isdigit()):
-                self._read_number()
-            # Parentheses
-            elif char == "(":
-                self.tokens.append(Token(TokenType.LPAREN, char, self.position))
-                self.position += 1
-            elif char == ")":
-                self.tokens.append(Token(TokenType.RPAREN, char, self.position))
-                self.position += 1
-            # Operators and identifiers
-            elif char in "<>=!~&|":
-                if (
-                    not self._check_multi_char_operator()
-                    and not self._check_multi_char_logical_operator()
-                ):
-                    self._read_operator()
-            # Identifiers and keywords
-            elif char.isalpha() or char == "_":
-                self._read_identifier()
-            else:
-                raise ExpressionError(
-                    f"Unexpected character '{char}' at position {self.position}"
-                )
-
-        self.tokens.append(Token(TokenType.EOF, "", self.position))
+        self.tokens = list(self.iter_tokens())
         return self.tokens
 
-    def _skip_whitespace(self) -> None:
-        """Skip whitespace characters."""
-        while (
-            self.position < len(self.expression)
-            and self.expression[self.position].isspace()
-        ):
-            self.position += 1
-
-    def _peek(self, offset: int = 1) -> str:
-        """Peek at the next character without advancing position."""
-        pos = self.position + offset
-        return self.expression[pos] if pos < len(self.expression) else ""
-
-    def _read_string(self, quote_char: str) -> None:
-        """Read a string literal."""
-        start_pos = self.position
-        self.position += 1  # Skip opening quote
-        value = ""
-
-        while self.position < len(self.expression):
-            char = self.expression[self.position]
-            if char == quote_char:
-                self.position += 1  # Skip closing quote
-                self.tokens.append(Token(TokenType.STRING, value, start_pos))
-                return
-            elif char == "\\" and self._peek() in (quote_char, "\\"):
-                # Handle escaped quotes and backslashes
-                self.position += 1
-                value += self.expression[self.position]
-            else:
-                value += char
-            self.position += 1
-
-        raise ExpressionError(
-            f"Unterminated string literal starting at position {start_pos}"
-        )
-
-    def _read_number(self) -> None:
-        """Read a numeric literal."""
-        start_pos = self.position
-        value = ""
-
-        # Handle negative numbers
-        if self.expression[self.position] == "-":
-            value += "-"
-            self.position += 1
-
-        # Read digits and decimal point
-        while self.position < len(self.expression):
-            char = self.expression[self.position]
-            if char.isdigit() or char == ".":
-                value += char
-                self.position += 1
+    def iter_tokens(self) -> Iterator[Token]:
+        """Yield the expression's tokens one at a time, ending with EOF."""
+        self.position = 0
+        expression = self.expression
+
+        for match in _TOKEN_RE.finditer(expression):
+            start = match.start()
+            if start != self.position:
+                self._raise_unexpected(self.position)
+            self.position = match.end()
+
+            kind = match.lastgroup
+            if kind == "WS":
+                continue
+            if kind == "STRING":
+                yield Token(TokenType.STRING, _unquote(match.group()), start)
+            elif kind == "NUMBER":
+                yield Token(TokenType.NUMBER, match.group(), start)
+            elif kind == "IDENT":
+                value = match.group()
+                # Keywords are at most three letters, so longer names skip
+                # the case conversion
+                if value in _LOGICAL_KEYWORDS:
+                    yield Token(TokenType.LOGICAL, value, start)
+                elif len(value) <= 3 and value.upper() in _LOGICAL_KEYWORDS:
+                    yield Token(TokenType.LOGICAL, value.upper(), start)
+                else:
+                    yield Token(TokenType.IDENTIFIER, value, start)
             else:
-                break
+                yield Token(_TOKEN_TYPES[kind], match.group(), start)
 
-        self.tokens.append(Token(TokenType.NUMBER, value, start_pos))
+        if self.position != len(expression):
+            self._raise_unexpected(self.position)
 
-    def _check_multi_char_operator(self) -> bool:
-        """Check for multi-character operators."""
-        for op in sorted(self.OPERATORS.keys(), key=len, reverse=True):
-            if self.expression[self.position : self.position + len(op)] == op:
-                self.tokens.append(Token(TokenType.OPERATOR, op, self.position))
-                self.position += len(op)
-                return True
-        return False
-
-    def _check_multi_char_logical_operator(self) -> bool:
-        """Check for multi-character logical operators like && and ||."""
-        # Check for && and ||
-        if self.position + 1 < len(self.expression):
-            two_char = self.expression[self.position : self.position + 2]
-            if two_char in ("&&", "||"):
-                self.tokens.append(Token(TokenType.LOGICAL, two_char, self.position))
-                self.position += 2
-                return True
-        return False
-
-    def _read_operator(self) -> None:
-        """Read a single-character operator."""
-        start_pos = self.position
-        char = self.expression[self.position]
-
-        # Check for compound operators
-        if char == "=" and self._peek() == "=":
-            self.tokens.append(Token(TokenType.OPERATOR, "==", start_pos))
-            self.position += 2
-        elif char == "!" and self._peek() == "=":
-            self.tokens.append(Token(TokenType.OPERATOR, "!=", start_pos))
-            self.position += 2
-        elif char == "<" and self._peek() == "=":
-            self.tokens.append(Token(TokenType.OPERATOR, "<=", start_pos))
-            self.position += 2
-        elif char == ">" and self._peek() == "=":
-            self.tokens.append(Token(TokenType.OPERATOR, ">=", start_pos))
-            self.position += 2
-        elif char == "!" and self._peek() == "~":
-            self.tokens.append(Token(TokenType.OPERATOR, "!~", start_pos))
-            self.position += 2
-        elif char == "=" and self._peek() == "~":
-            self.tokens.append(Token(TokenType.OPERATOR, "=~", start_pos))
-            self.position += 2
-        elif char in "<>":
-            self.tokens.append(Token(TokenType.OPERATOR, char, start_pos))
-            self.position += 1
-        elif char == "!":
-            self.tokens.append(Token(TokenType.LOGICAL, "!", start_pos))
-            self.position += 1
-        elif char == "&" and self._peek() == "&":
-            self.tokens.append(Token(TokenType.LOGICAL, "&&", start_pos))
-            self.position += 2
-        elif char == "|" and self._peek() == "|":
-            self.tokens.append(Token(TokenType.LOGICAL, "||", start_pos))
-            self.position += 2
-        else:
-            raise ExpressionError(f"Unknown operator '{char}' at position {start_pos}")
-
-    def _read_identifier(self) -> None:
-        """Read an identifier or keyword."""
-        start_pos = self.position
-        value = ""
-
-        while self.position < len(self.expression):
-            char = self.expression[self.position]
-            if char.isalnum() or char == "_":
-                value += char
-                self.position += 1
-            else:
-                break
+        yield Token(TokenType.EOF, "", self.position)
 
-        # Check if it's a logical operator
-        if value.upper() in self.LOGICAL_OPERATORS:
-            self.tokens.append(Token(TokenType.LOGICAL, value.upper(), start_pos))
-        else:
-            self.tokens.append(Token(TokenType.IDENTIFIER, value, start_pos))
+    def _raise_unexpected(self, position: int) -> None:
+        """Raise the error for input the token pattern could not match."""
+        char = self.expression[position]
+        if char in ('"', "'"):
+            raise ExpressionError(
+                f"Unterminated string literal starting at position {position}"
+            )
+        if char in "=~&|":
+            raise ExpressionError(f"Unknown operator '{char}' at position {position}")
+        raise ExpressionError(f"Unexpected character '{char}' at position {position}")
+
+
+# Every token the lexer accepts, as one alternation scanned by the regex engine.
+# Two-character operators are listed before their one-character prefixes.
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<WS>\s+)
+    | (?P<STRING>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+    | (?P<NUMBER>-?\d[\d.]*)
+    | (?P<OPERATOR>==|!=|<=|>=|=~|!~|<|>)
+    | (?P<LOGICAL>&&|\|\||!)
+    | (?P<LPAREN>\()
+    | (?P<RPAREN>\))
+    | (?P<IDENT>[^\W\d]\w*)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Identifier-shaped logical operators, matched case-insensitively
+_LOGICAL_KEYWORDS = frozenset(
+    op for op in ExpressionLexer.LOGICAL_OPERATORS if op.isalpha()
+)
+
+# Boolean literal keywords, matched case-insensitively
+_BOOLEAN_KEYWORDS = {"true": True, "false": False}
+
+_TOKEN_TYPES = {
+    "OPERATOR": TokenType.OPERATOR,
+    "LOGICAL": TokenType.LOGICAL,
+    "LPAREN": TokenType.LPAREN,
+    "RPAREN": TokenType.RPAREN,
+}
+
+_STRING_ESCAPES = {
+    '"': re.compile(r'\\(["\\])'),
+    "'": re.compile(r"\\(['\\])"),
+}
+
+
+def _unquote(literal: str) -> str:
+    """Strip the quotes from a string literal and resolve its escapes.
+
+    Only the enclosing quote character and backslash can be escaped; any
+    other backslash is kept as written, so regex patterns pass through.
+    """
+    body = literal[1:-1]
+    if "\\" not in body:
+        return body
+    return _STRING_ESCAPES[literal[0]].sub(r"\1", body)
 
 
 class ExpressionParser:
-    """Parser for conditional expressions using recursive descent parsing."""
+    """Parser for conditional expressions.
 
-    def __init__(self, tokens: list[Token]):
-        self.tokens = tokens
-        self.position = 0
-        self.current_token = self.tokens[0] if tokens else Token(TokenType.EOF, "", 0)
+    Logical operators are handled by precedence climbing and everything
+    below them by recursive descent.
+    """
+
+    def __init__(self, tokens: Iterable[Token]):
+        # Tokens are consumed one at a time, so a lexer's iter_tokens()
+        # generator can be parsed without building the full list first
+        self._tokens = iter(tokens)
+        self.current_token = next(self._tokens, Token(TokenType.EOF, "", 0))
 
     def parse(self) -> ExpressionNode:
         """Parse the tokens into an abstract syntax tree."""
-        expr = self._parse_or_expression()
+        expr = self._parse_logical_expression()
         if self.current_token.type != TokenType.EOF:
             raise ExpressionError(
                 f"Unexpected token '{self.current_token.value}' at position {self.current_token.position}"
@@ -279,63 +209,56 @@ class ExpressionParser:
         return expr
 
     def _advance(self) -> None:
-        """Move to the next token."""
-        if self.position < len(self.tokens) - 1:
-            self.position += 1
-            self.current_token = self.tokens[self.position]
-
-    def _parse_or_expression(self) -> ExpressionNode:
-        """Parse OR expressions (lowest precedence)."""
-        left = self._parse_and_expression()
-
-        while (
-            self.current_token.type == TokenType.LOGICAL
-            and self.current_token.value in ("OR", "||")
-        ):
-            op = self.current_token.value
-            self._advance()
-            right = self._parse_and_expression()
-            left = BinaryOpNode(left, op, right)
+        """Move to the next token, staying on the last one once exhausted."""
+        self.current_token = next(self._tokens, self.current_token)
 
-        return left
+    def _parse_logical_expression(self, min_precedence: int = 0) -> ExpressionNode:
+        """Parse AND/OR chains by precedence climbing.
 
-    def _parse_and_expression(self) -> ExpressionNode:
-        """Parse AND expressions."""
+        Each loop iteration consumes one operator binding at least as tightly
+        as ``min_precedence``; its right operand is parsed with a higher
+        minimum so AND groups before OR and both associate to the left.
+        """
         left = self._parse_not_expression()
 
-        while (
-            self.current_token.type == TokenType.LOGICAL
-            and self.current_token.value in ("AND", "&&")
-        ):
+        while self.current_token.type == TokenType.LOGICAL:
             op = self.current_token.value
+            precedence = _BINARY_LOGICAL_PRECEDENCE.get(op)
+            if precedence is None or precedence < min_precedence:
+                break
             self._advance()
-            right = self._parse_not_expression()
-            left = BinaryOpNode(left, op, right)
+            right = self._parse_logical_expression(precedence + 1)
+            left = _binary_node(left, op, right)
 
         return left
 
     def _parse_not_expression(self) -> ExpressionNode:
         """Parse NOT expressions (highest precedence for logical operators)."""
-        if (
-            self.current_token.type == TokenType.LOGICAL
-            and self.current_token.value in ("NOT", "!")
+        ops = []
+        while self.current_token.type == TokenType.LOGICAL and (
+            self.current_token.value in ("NOT", "!")
         ):
-            op = self.current_token.value
+            ops.append(self.current_token.value)
             self._advance()
-            operand = self._parse_not_expression()
-            return UnaryOpNode(op, operand)
 
-        return self._parse_comparison_expression()
+        operand = self._parse_comparison_expression()
+        for op in reversed(ops):
+            operand = _shared_node((op, operand), NotNode, op, operand)
+        return operand
 
     def _parse_comparison_expression(self) -> ExpressionNode:
-        """Parse comparison expressions."""
+        """Parse comparison expressions.
+
+        Comparisons take primaries on both sides and do not chain, so they
+        are parsed here rather than in the precedence loop.
+        """
         left = self._parse_primary_expression()
 
         if self.current_token.type == TokenType.OPERATOR:
             op = self.current_token.value
             self._advance()
             right = self._parse_primary_expression()
-            return BinaryOpNode(left, op, right)
+            return _binary_node(left, op, right)
 
         return left
 
@@ -345,24 +268,28 @@ class ExpressionParser:
 
         if token.type == TokenType.STRING:
             self._advance()
-            return LiteralNode(token.value)
+            return _literal_node(token.value)
         elif token.type == TokenType.NUMBER:
             self._advance()
-            # Try to parse as int first, then float
-            try:
-                value: int | float = int(token.value)
-            except ValueError:
-                value = float(token.value)
-            return LiteralNode(value)
+            # Number tokens are digits with optional dots, so a dot marks a float
+            value: int | float = (
+                float(token.value) if "." in token.value else int(token.value)
+            )
+            return _literal_node(value)
         elif token.type == TokenType.IDENTIFIER:
             self._advance()
             # Handle boolean literals
-            if token.value.lower() in ("true", "false"):
-                return LiteralNode(token.value.lower() == "true")
-            return IdentifierNode(token.value)
+            boolean = _BOOLEAN_KEYWORDS.get(token.value)
+            if boolean is None and len(token.value) in (4, 5):
+                boolean = _BOOLEAN_KEYWORDS.get(token.value.lower())
+            if boolean is not None:
+                return _literal_node(boolean)
+            return _shared_node(
+                (IdentifierNode, token.value), IdentifierNode, token.value
+            )
         elif token.type == TokenType.LPAREN:
             self._advance()
-            expr = self._parse_or_expression()
+            expr = self._parse_logical_expression()
             if self.current_token.type != TokenType.RPAREN:
                 raise ExpressionError(
                     f"Expected ')' at position {self.current_token.position}"
@@ -375,40 +302,224 @@ class ExpressionParser:
             )
 
 
+# Marks an identifier absent from the evaluation context
+_MISSING = object()
+
+# Strings that count as true; any other string is false
+_TRUTHY = frozenset({"true", "1", "yes", "on"})
+
+
+def _is_truthy(value: Any) -> bool:
+    """Determine if a value is truthy."""
+    if isinstance(value, bool):
+        return value
+    elif isinstance(value, str):
+        return value.lower() in _TRUTHY
+    elif isinstance(value, int | float):
+        return value != 0
+    else:
+        return bool(value)
+
+
+# Comparison strategies, chosen once per pair of operand types by
+# _coercion_plan. Each takes the operands and the comparison function.
+
+
+def _compare_bool_str(left: Any, right: Any, op: Callable[[Any, Any], bool]) -> bool:
+    """Compare a boolean with a string by spelling the boolean out."""
+    return op("true" if left else "false", right)
+
+
+def _compare_str_bool(left: Any, right: Any, op: Callable[[Any, Any], bool]) -> bool:
+    """Compare a string with a boolean by spelling the boolean out."""
+    return op(left, "true" if right else "false")
+
+
+def _compare_str_str(left: Any, right: Any, op: Callable[[Any, Any], bool]) -> bool:
+    """Compare two strings numerically when both parse as numbers."""
+    try:
+        left_num = float(left)
+        right_num = float(right)
+    except ValueError:
+        return op(left, right)
+    return op(left_num, right_num)
+
+
+def _compare_num_str(left: Any, right: Any, op: Callable[[Any, Any], bool]) -> bool:
+    """Compare a number with a string, parsing the string if possible."""
+    try:
+        right_num = float(right)
+    except ValueError:
+        return _compare_direct(left, right, op)
+    return op(left, right_num)
+
+
+def _compare_str_num(left: Any, right: Any, op: Callable[[Any, Any], bool]) -> bool:
+    """Compare a string with a number, parsing the string if possible."""
+    try:
+        left_num = float(left)
+    except ValueError:
+        return _compare_direct(left, right, op)
+    return op(left_num, right)
+
+
+def _compare_direct(left: Any, right: Any, op: Callable[[Any, Any], bool]) -> bool:
+    """Compare values as they are, falling back to their string forms."""
+    try:
+        return op(left, right)
+    except TypeError:
+        return op(str(left), str(right))
+
+
+@lru_cache(maxsize=128)
+def _coercion_plan(
+    left_type: type, right_type: type
+) -> Callable[[Any, Any, Callable[[Any, Any], bool]], bool]:
+    """Pick how operands of the given types are coerced before comparing."""
+    left_str = issubclass(left_type, str)
+    right_str = issubclass(right_type, str)
+    if issubclass(left_type, bool) and right_str:
+        return _compare_bool_str
+    if left_str and issubclass(right_type, bool):
+        return _compare_str_bool
+    if left_str and right_str:
+        return _compare_str_str
+    if issubclass(left_type, int | float) and right_str:
+        return _compare_num_str
+    if left_str and issubclass(right_type, int | float):
+        return _compare_str_num
+    return _compare_direct
+
+
+def _get_variable(context: dict[str, Any], name: str) -> Any:
+    """Look up ``name`` in ``context`` for compiled expressions."""
+    value = context.get(name, _MISSING)
+    if value is _MISSING:
+        raise ExpressionError(f"Undefined variable: {name}")
+    return value
+
+
+def _search(pattern: re.Pattern[str], text: Any) -> bool:
+    """Search ``text`` for a precompiled pattern in compiled expressions."""
+    return pattern.search(text if isinstance(text, str) else str(text)) is not None
+
+
+def _truth_source(node: ExpressionNode, namespace: dict[str, Any]) -> str:
+    """Return source for ``node`` tested for truth in compiled expressions."""
+    source = node.to_source(namespace)
+    return source if node.RETURNS_BOOL else f"_truthy({source})"
+
+
+def _bind(namespace: dict[str, Any], value: Any) -> str:
+    """Store ``value`` in a compiled expression's namespace and return its name."""
+    name = f"_k{len(namespace)}"
+    namespace[name] = value
+    return name
+
+
 # AST Node classes
 class ExpressionNode:
     """Base class for expression AST nodes."""
 
+    __slots__ = ("_compiled", "__weakref__")
+
+    # Whether evaluate() always returns a bool, so callers testing the result
+    # for truth can skip _is_truthy
+    RETURNS_BOOL = False
+
     def evaluate(self, context: dict[str, Any]) -> Any:
         """Evaluate the expression node with the given context."""
         raise NotImplementedError
 
+    def to_source(self, namespace: dict[str, Any]) -> str:
+        """Return Python source that evaluates this node against ``ctx``.
+
+        Objects the source refers to are added to ``namespace``. Nodes
+        without a dedicated translation call back into evaluate().
+        """
+        return f"{_bind(namespace, self)}.evaluate(ctx)"
+
+    def compile(self) -> Callable[[dict[str, Any]], Any]:
+        """Compile the tree rooted here into a function of the context.
+
+        The function returns the same result as evaluate() but runs as a
+        single Python expression instead of a walk over the nodes. It is
+        built on first use and kept on the node; trees nested too deeply
+        for the Python compiler fall back to evaluate().
+        """
+        compiled: Callable[[dict[str, Any]], Any] | None = getattr(
+            self, "_compiled", None
+        )
+        if compiled is None:
+            namespace: dict[str, Any] = {
+                "_get": _get_variable,
+                "_truthy": _is_truthy,
+                "_compare": BinaryOpNode._compare_values,
+                "_regex": BinaryOpNode._regex_match,
+                "_search": _search,
+            }
+            source = f"lambda ctx: {self.to_source(namespace)}"
+            try:
+                code = compile(source, "<expression>", "eval")
+            except (SyntaxError, RecursionError):
+                # Nesting beyond what the Python compiler accepts
+                compiled = self.evaluate
+            else:
+                compiled = eval(code, namespace)
+            self._compiled = compiled
+        return compiled
+
 
 class LiteralNode(ExpressionNode):
     """Node for literal values."""
 
+    __slots__ = ("value",)
+
     def __init__(self, value: Any):
         self.value = value
 
     def evaluate(self, _context: dict[str, Any]) -> Any:
         return self.value
 
+    def to_source(self, namespace: dict[str, Any]) -> str:
+        if type(self.value) in (str, bool, int):
+            return repr(self.value)
+        return _bind(namespace, self.value)
+
 
 class IdentifierNode(ExpressionNode):
     """Node for identifiers (variables)."""
 
+    __slots__ = ("name",)
+
     def __init__(self, name: str):
-        self.name = name
+        self.name = sys.intern(name)
 
     def evaluate(self, context: dict[str, Any]) -> Any:
-        if self.name not in context:
+        value = context.get(self.name, _MISSING)
+        if value is _MISSING:
             raise ExpressionError(f"Undefined variable: {self.name}")
-        return context[self.name]
+        return value
+
+    def to_source(self, _namespace: dict[str, Any]) -> str:
+        return f"_get(ctx, {self.name!r})"
 
 
 class BinaryOpNode(ExpressionNode):
     """Node for binary operations."""
 
+    __slots__ = ("left", "operator", "right")
+
+    # Comparison operators and the functions implementing them
+    _CMP_OPS: dict[str, Callable[[Any, Any], bool]] = {
+        "==": operator.eq,
+        "!=": operator.ne,
+        "<": operator.lt,
+        ">": operator.gt,
+        "<=": operator.le,
+        ">=": operator.ge,
+    }
+
     def __init__(self, left: ExpressionNode, operator: str, right: ExpressionNode):
         self.left = left
         self.operator = operator
@@ -419,31 +530,22 @@ class BinaryOpNode(ExpressionNode):
 
         # Short-circuit evaluation for logical operators
         if self.operator in ("OR", "||"):
-            if self._is_truthy(left_val):
+            if _is_truthy(left_val):
                 return True
             right_val = self.right.evaluate(context)
-            return self._is_truthy(right_val)
+            return _is_truthy(right_val)
         elif self.operator in ("AND", "&&"):
-            if not self._is_truthy(left_val):
+            if not _is_truthy(left_val):
                 return False
             right_val = self.right.evaluate(context)
-            return self._is_truthy(right_val)
+            return _is_truthy(right_val)
 
         # Regular binary operations
         right_val = self.right.evaluate(context)
 
-        if self.operator == "==":
-            return self._compare_values(left_val, right_val, operator.eq)
-        elif self.operator == "!=":
-            return self._compare_values(left_val, right_val, operator.ne)
-        elif self.operator == "<":
-            return self._compare_values(left_val, right_val, operator.lt)
-        elif self.operator == ">":
-            return self._compare_values(left_val, right_val, operator.gt)
-        elif self.operator == "<=":
-            return self._compare_values(left_val, right_val, operator.le)
-        elif self.operator == ">=":
-            return self._compare_values(left_val, right_val, operator.ge)
+        cmp_op = self._CMP_OPS.get(self.operator)
+        if cmp_op is not None:
+            return self._compare_values(left_val, right_val, cmp_op)
         elif self.operator == "=~":
             return self._regex_match(left_val, right_val)
         elif self.operator == "!~":
@@ -451,74 +553,34 @@ class BinaryOpNode(ExpressionNode):
         else:
             raise ExpressionError(f"Unknown operator: {self.operator}")
 
-    def _is_truthy(self, value: Any) -> bool:
-        """Determine if a value is truthy."""
-        if isinstance(value, bool):
-            return value
-        elif isinstance(value, str):
-            return value.lower() in ("true", "1", "yes", "on") and value != ""
-        elif isinstance(value, int | float):
-            return value != 0
-        else:
-            return bool(value)
-
-    def _compare_values(
-        self, left: Any, right: Any, op: Callable[[Any, Any], bool]
-    ) -> bool:
+    @staticmethod
+    def _compare_values(left: Any, right: Any, op: Callable[[Any, Any], bool]) -> bool:
         """Compare two values with type coercion."""
-        # Handle boolean/string comparisons specially
-        if isinstance(left, bool) and isinstance(right, str):
-            # Convert boolean to string for comparison
-            left_str = "true" if left else "false"
-            return op(left_str, right)
-        elif isinstance(left, str) and isinstance(right, bool):
-            # Convert boolean to string for comparison
-            right_str = "true" if right else "false"
-            return op(left, right_str)
-
-        # Try numeric comparison first
-        try:
-            if isinstance(left, str) and isinstance(right, str):
-                # Try to convert both to numbers
-                try:
-                    left_num = float(left)
-                    right_num = float(right)
-                    return op(left_num, right_num)
-                except ValueError:
-                    # Fall back to string comparison
-                    pass
-            elif isinstance(left, int | float) and isinstance(right, str):
-                try:
-                    right_num = float(right)
-                    return op(left, right_num)
-                except ValueError:
-                    pass
-            elif isinstance(left, str) and isinstance(right, int | float):
-                try:
-                    left_num = float(left)
-                    return op(left_num, right)
-                except ValueError:
-                    pass
-
-            # Direct comparison
-            return op(left, right)
-        except TypeError:
-            # Fall back to string comparison
-            return op(str(left), str(right))
-
-    def _regex_match(self, text: Any, pattern: Any) -> bool:
+        return _coercion_plan(type(left), type(right))(left, right, op)
+
+    @staticmethod
+    def _regex_match(text: Any, pattern: Any) -> bool:
         """Perform regex matching."""
         try:
-            text_str = str(text)
-            pattern_str = str(pattern)
-            return bool(re.search(pattern_str, text_str))
+            compiled = _compile_regex(
+                pattern if isinstance(pattern, str) else str(pattern)
+            )
         except re.error as e:
             raise ExpressionError(f"Invalid regex pattern '{pattern}': {e}") from e
+        return compiled.search(text if isinstance(text, str) else str(text)) is not None
+
+
+@lru_cache(maxsize=512)
+def _compile_regex(pattern: str) -> re.Pattern[str]:
+    """Compile a regex pattern used by ``=~``/``!~``, reusing earlier compiles."""
+    return re.compile(pattern)
 
 
 class UnaryOpNode(ExpressionNode):
     """Node for unary operations."""
 
+    __slots__ = ("operator", "operand")
+
     def __init__(self, operator: str, operand: ExpressionNode):
         self.operator = operator
         self.operand = operand
@@ -527,48 +589,266 @@ class UnaryOpNode(ExpressionNode):
         operand_val = self.operand.evaluate(context)
 
         if self.operator in ("NOT", "!"):
-            return not self._is_truthy(operand_val)
+            return not _is_truthy(operand_val)
         else:
             raise ExpressionError(f"Unknown unary operator: {self.operator}")
 
-    def _is_truthy(self, value: Any) -> bool:
-        """Determine if a value is truthy."""
-        if isinstance(value, bool):
-            return value
-        elif isinstance(value, str):
-            return value.lower() in ("true", "1", "yes", "on") and value != ""
-        elif isinstance(value, int | float):
-            return value != 0
+
+class OrNode(BinaryOpNode):
+    """Node for ``OR``/``||``, short-circuiting on a truthy left operand."""
+
+    __slots__ = ()
+
+    RETURNS_BOOL = True
+
+    def evaluate(self, context: dict[str, Any]) -> Any:
+        left, right = self.left, self.right
+        value = left.evaluate(context)
+        if value if left.RETURNS_BOOL else _is_truthy(value):
+            return True
+        value = right.evaluate(context)
+        return value if right.RETURNS_BOOL else _is_truthy(value)
+
+    def to_source(self, namespace: dict[str, Any]) -> str:
+        left = _truth_source(self.left, namespace)
+        right = _truth_source(self.right, namespace)
+        return f"({left} or {right})"
+
+
+class AndNode(BinaryOpNode):
+    """Node for ``AND``/``&&``, short-circuiting on a falsy left operand."""
+
+    __slots__ = ()
+
+    RETURNS_BOOL = True
+
+    def evaluate(self, context: dict[str, Any]) -> Any:
+        left, right = self.left, self.right
+        value = left.evaluate(context)
+        if not (value if left.RETURNS_BOOL else _is_truthy(value)):
+            return False
+        value = right.evaluate(context)
+        return value if right.RETURNS_BOOL else _is_truthy(value)
+
+    def to_source(self, namespace: dict[str, Any]) -> str:
+        left = _truth_source(self.left, namespace)
+        right = _truth_source(self.right, namespace)
+        return f"({left} and {right})"
+
+
+class ComparisonNode(BinaryOpNode):
+    """Node for ``==``, ``!=``, ``<``, ``>``, ``<=`` and ``>=``."""
+
+    __slots__ = ("_cmp_op", "_plan")
+
+    RETURNS_BOOL = True
+
+    def __init__(self, left: ExpressionNode, operator: str, right: ExpressionNode):
+        super().__init__(left, operator, right)
+        self._cmp_op = self._CMP_OPS[operator]
+        # Operand types seen last and the coercion strategy for them; the
+        # types are usually the same on every evaluation
+        self._plan: tuple[tuple[type, type], Callable[..., bool]] | None = None
+
+    def evaluate(self, context: dict[str, Any]) -> Any:
+        left = self.left.evaluate(context)
+        right = self.right.evaluate(context)
+        types = (type(left), type(right))
+        plan = self._plan
+        if plan is None or plan[0] != types:
+            plan = self._plan = (types, _coercion_plan(*types))
+        return plan[1](left, right, self._cmp_op)
+
+    def to_source(self, namespace: dict[str, Any]) -> str:
+        left = self.left.to_source(namespace)
+        right = self.right.to_source(namespace)
+        return f"_compare({left}, {right}, {_bind(namespace, self._cmp_op)})"
+
+
+class RegexMatchNode(BinaryOpNode):
+    """Node for ``=~`` and its negation ``!~``."""
+
+    __slots__ = ("_negate", "_pattern")
+
+    RETURNS_BOOL = True
+
+    def __init__(self, left: ExpressionNode, operator: str, right: ExpressionNode):
+        super().__init__(left, operator, right)
+        self._negate = operator == "!~"
+        # A literal pattern is compiled once here instead of on every
+        # evaluation; invalid ones are reported when evaluated, as before
+        self._pattern: re.Pattern[str] | None = None
+        if isinstance(right, LiteralNode):
+            with contextlib.suppress(re.error):
+                self._pattern = _compile_regex(str(right.value))
+
+    def evaluate(self, context: dict[str, Any]) -> Any:
+        text = self.left.evaluate(context)
+        if self._pattern is not None:
+            matched = (
+                self._pattern.search(text if isinstance(text, str) else str(text))
+                is not None
+            )
         else:
-            return bool(value)
+            matched = self._regex_match(text, self.right.evaluate(context))
+        return matched != self._negate
+
+    def to_source(self, namespace: dict[str, Any]) -> str:
+        left = self.left.to_source(namespace)
+        if self._pattern is not None:
+            match = f"_search({_bind(namespace, self._pattern)}, {left})"
+        else:
+            match = f"_regex({left}, {self.right.to_source(namespace)})"
+        return f"(not {match})" if self._negate else match
+
+
+class NotNode(UnaryOpNode):
+    """Node for ``NOT``/``!``."""
+
+    __slots__ = ()
+
+    RETURNS_BOOL = True
+
+    def evaluate(self, context: dict[str, Any]) -> Any:
+        operand = self.operand
+        value = operand.evaluate(context)
+        return not (value if operand.RETURNS_BOOL else _is_truthy(value))
+
+    def to_source(self, namespace: dict[str, Any]) -> str:
+        return f"(not {_truth_source(self.operand, namespace)})"
+
+
+# Precedence of the binary logical operators, from the lexer's table
+_BINARY_LOGICAL_PRECEDENCE = {
+    op: precedence
+    for op, (name, precedence) in ExpressionLexer.LOGICAL_OPERATORS.items()
+    if name != "not"
+}
+
+# Node class built by the parser for each binary operator
+_BINARY_NODE_TYPES: dict[str, type[BinaryOpNode]] = {
+    "OR": OrNode,
+    "||": OrNode,
+    "AND": AndNode,
+    "&&": AndNode,
+    "=~": RegexMatchNode,
+    "!~": RegexMatchNode,
+    **dict.fromkeys(BinaryOpNode._CMP_OPS, ComparisonNode),
+}
+
+
+_N = TypeVar("_N", bound=ExpressionNode)
+
+# Nodes built by the parser, keyed by their structure, so equal subtrees of
+# different expressions are one object. Keys hold child nodes themselves
+# (compared by identity), and entries go away with the last tree using them.
+_SHARED_NODES: weakref.WeakValueDictionary[tuple[Any, ...], ExpressionNode] = (
+    weakref.WeakValueDictionary()
+)
 
 
+def _shared_node(key: tuple[Any, ...], node_type: type[_N], *args: Any) -> _N:
+    """Return the existing node for ``key``, building it on first use."""
+    node = _SHARED_NODES.get(key)
+    if node is None:
+        node = _SHARED_NODES[key] = node_type(*args)
+    return node  # type: ignore[return-value]
+
+
+def _literal_node(value: Any) -> LiteralNode:
+    """Build a literal node; the type is part of the key as 1 == 1.0 == True."""
+    return _shared_node((LiteralNode, type(value), value), LiteralNode, value)
+
+
+def _binary_node(
+    left: ExpressionNode, operator: str, right: ExpressionNode
+) -> BinaryOpNode:
+    """Build the node specialized for ``operator``."""
+    node_type = _BINARY_NODE_TYPES.get(operator, BinaryOpNode)
+    return _shared_node((operator, left, right), node_type, left, operator, right)
+
+
+@lru_cache(maxsize=1024)
 def parse_expression(expression: str) -> ExpressionNode:
-    """Parse a conditional expression string into an AST."""
-    if not expression or not expression.strip():
+    """Parse a conditional expression string into an AST.
+
+    Parsed trees are cached per expression string and shared between
+    callers, so they must not be modified.
+    """
+    if expression and (expression[0].isspace() or expression[-1].isspace()):
+        expression = expression.strip()
+    if not expression:
         raise ExpressionError("Empty expression")
 
-    lexer = ExpressionLexer(expression.strip())
-    tokens = lexer.tokenize()
+    lexer = ExpressionLexer(expression)
+    parser = ExpressionParser(lexer.iter_tokens())
+    return _fold_constants(parser.parse())
+
+
+def _fold_constants(node: ExpressionNode) -> ExpressionNode:
+    """Replace subtrees that do not depend on the context with their value.
+
+    A subtree that evaluates against an empty context references no
+    variables (or short-circuits before reaching them), so its result is the
+    same for every context. Subtrees that fail to evaluate are left intact
+    so the error surfaces at evaluation time as before. Nodes are shared
+    between trees, so a node whose children fold is rebuilt, not modified.
+    """
+    if isinstance(node, BinaryOpNode):
+        left = _fold_constants(node.left)
+        right = _fold_constants(node.right)
+        if left is not node.left or right is not node.right:
+            node = _binary_node(left, node.operator, right)
+    elif isinstance(node, UnaryOpNode):
+        operand = _fold_constants(node.operand)
+        if operand is not node.operand:
+            node = _shared_node(
+                (node.operator, operand), type(node), node.operator, operand
+            )
+    else:
+        return node
+
+    try:
+        return _literal_node(node.evaluate({}))
+    except ExpressionError:
+        return node
+
 
-    parser = ExpressionParser(tokens)
-    return parser.parse()
+@lru_cache(maxsize=512)
+def compile_expression(expression: str) -> Callable[[dict[str, Any]], bool]:
+    """Parse and compile a conditional expression into a reusable function.
+
+    The returned function evaluates the expression against a context and
+    returns its truth value. Functions are cached per expression string.
+
+    Raises:
+        ExpressionError: If the expression cannot be parsed
+    """
+    root = parse_expression(expression)
+    evaluate = root.compile()
+    if root.RETURNS_BOOL:
+        return evaluate
+    return lambda context: _is_truthy(evaluate(context))
 
 
 def evaluate_expression(expression: str, context: dict[str, Any]) -> bool:
     """Parse and evaluate a conditional expression."""
     try:
-        ast = parse_expression(expression)
-        result = ast.evaluate(context)
-
-        # Convert result to boolean
-        if isinstance(result, bool):
-            return result
-        elif isinstance(result, str):
-            return result.lower() in ("true", "1", "yes", "on") and result != ""
-        elif isinstance(result, int | float):
-            return result != 0
-        else:
-            return bool(result)
+        return compile_expression(expression)(context)
+    except Exception as e:
+        raise ExpressionError(f"Expression evaluation failed: {e}") from e
+
+
+def evaluate_expression_batch(
+    expression: str, contexts: Iterable[dict[str, Any]]
+) -> list[bool]:
+    """Evaluate one conditional expression against many contexts.
+
+    The expression is parsed and compiled once and reused for every
+    context, which is cheaper than calling evaluate_expression in a loop.
+    """
+    try:
+        evaluate = compile_expression(expression)
+        return [evaluate(context) for context in contexts]
     except Exception as e:
         raise ExpressionError(f"Expression evaluation failed: {e}") from e
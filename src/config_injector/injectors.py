@@ -3,25 +3,40 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
+import secrets
 import tempfile
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
+from .expression_parser import _TRUTHY, ExpressionError, evaluate_expression
+
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from .models import Injector
     from .token_engine import TokenEngine
     from .types import EnvMap, ProviderMaps, RuntimeContext
 
+logger = logging.getLogger(__name__)
+
+# Start of a ${...} token; strings without it need no expansion
+_TOKEN_START = "${"
+
+# Lower-cased spellings accepted as false; the true ones are _TRUTHY
+_FALSY = frozenset({"false", "0", "no", "off"})
 
-@dataclass
+
+@dataclass(slots=True)
 class ResolvedInjector:
     """Result of resolving an injector."""
 
     injector: Injector
     value: str | None
     applied_aliases: list[str]
-    argv_segments: list[str]
+    argv_segments: tuple[str, ...]
     env_updates: EnvMap
     files_created: list[Path]
     skipped: bool
@@ -44,88 +59,79 @@ def resolve_injector(
     providers: ProviderMaps,
     token_engine: TokenEngine,
     spec: Any | None = None,
+    eval_context: dict[str, Any] | None = None,
 ) -> ResolvedInjector:
-    """Resolve an injector to its final value and injection plan."""
+    """Resolve an injector to its final value and injection plan.
+
+    ``eval_context`` is the variables available to ``when`` conditions; pass
+    the result of build_eval_context() when resolving several injectors so
+    it is built once. It is built from ``context`` and ``providers`` if
+    omitted.
+    """
 
     # Check conditional injection
     if injector.when and not _evaluate_condition(
-        injector.when, context, providers, token_engine
+        injector.when, context, providers, token_engine, eval_context
     ):
         return ResolvedInjector(
             injector=injector,
             value=None,
             applied_aliases=[],
-            argv_segments=[],
+            argv_segments=(),
             env_updates={},
             files_created=[],
             skipped=True,
             errors=[],
         )
 
-    # Resolve value from sources
-    value = _resolve_value(injector, context, providers, token_engine)
+    plan = injector.plan
 
-    # Apply type coercion
-    if value is not None and injector.type:
-        value, coercion_errors = _coerce_type(value, injector.type, injector)
-    else:
-        coercion_errors = []
+    coercion_errors: list[str] = []
+    value = plan.static_value
+    if value is None:
+        # Resolve value from sources
+        value = _resolve_value(injector, context, providers, token_engine)
+
+        # Apply type coercion
+        if value is not None and plan.coerce is not None:
+            value, coercion_errors = plan.coerce(value)
 
     # Build injection plan
-    applied_aliases = []
-    argv_segments = []
-    env_updates = {}
-    files_created = []
-
-    if value is not None and not coercion_errors:
-        if injector.kind == "env_var":
-            applied_aliases = injector.aliases
-            for alias in applied_aliases:
-                env_updates[alias] = value
-
-        elif injector.kind == "named":
-            if injector.aliases:
-                applied_aliases = injector.aliases
-                alias = injector.aliases[0]  # Use first alias
-                if injector.connector == "=":
-                    argv_segments.append(f"{alias}={value}")
-                elif injector.connector == "space":
-                    argv_segments.extend([alias, value])
-                else:  # repeat
-                    argv_segments.extend([alias, value])
-
-        elif injector.kind == "positional":
-            argv_segments.append(value)
-
-        elif injector.kind == "file":
-            file_path = _create_temp_file(value, injector)
-            files_created.append(file_path)
-
-            if injector.aliases:
-                # Check if any alias is used as a token in the command
-                alias_used_as_token = False
-                if spec and hasattr(spec, "target") and hasattr(spec.target, "command"):
-                    command_str = " ".join(spec.target.command)
-                    for alias in injector.aliases:
-                        if f"${{{alias}}}" in command_str:
-                            alias_used_as_token = True
-                            break
-
-                if not alias_used_as_token:
-                    # Inject file path as named argument only if not used as token
-                    alias = injector.aliases[0]
-                    if injector.connector == "=":
-                        argv_segments.append(f"{alias}={file_path}")
-                    else:
-                        argv_segments.extend([alias, str(file_path)])
-            else:
-                # Inject file path as environment variable
-                env_updates["TEMP_FILE"] = str(file_path)
-
-        elif injector.kind == "stdin_fragment":
-            # Store the value to be aggregated by the build process
-            # The value will be appended to stdin_data in build_env_and_argv
-            pass
+    applied_aliases: list[str] = []
+    files_created: list[Path] = []
+
+    if value is None or coercion_errors:
+        argv_segments: tuple[str, ...] = ()
+        env_updates: EnvMap = {}
+
+    elif plan.kind == "file":
+        argv_segments = ()
+        env_updates = {}
+        file_path = _create_temp_file(value, injector)
+        files_created.append(file_path)
+
+        aliases = injector.aliases
+        if aliases:
+            # Check if any alias is used as a token in the command
+            alias_used_as_token = spec is not None and not (
+                spec.command_tokens.isdisjoint(aliases)
+            )
+
+            if not alias_used_as_token:
+                # Inject file path as named argument only if not used as token
+                alias = aliases[0]
+                if plan.connector == "=":
+                    argv_segments = (f"{alias}={file_path}",)
+                else:
+                    argv_segments = (alias, str(file_path))
+        else:
+            # Inject file path as environment variable
+            env_updates["TEMP_FILE"] = str(file_path)
+
+    else:
+        applied_aliases = plan.applied_aliases
+        argv_segments = plan.build_argv(value)
+        env_updates = plan.build_env(value)
 
     errors = coercion_errors
 
@@ -141,6 +147,120 @@ def resolve_injector(
     )
 
 
+@dataclass(frozen=True, slots=True)
+class InjectionPlan:
+    """How an injector turns its resolved value into injections.
+
+    Built once per injector when it is constructed, so resolving does not
+    re-dispatch on its kind, connector and type. File injectors only use
+    ``kind`` since they create a temporary file per call. ``static_value``
+    is the final, already coerced value of injectors with no sources and a
+    constant default, or None. ``default_value`` is the default as a string
+    and ``default_needs_expand`` whether it contains tokens to expand.
+    Plans compare by the injector settings they were built from.
+    """
+
+    kind: str
+    static_value: str | None
+    default_value: str | None
+    default_needs_expand: bool
+    applied_aliases: list[str]
+    target_type: str | None
+    connector: str | None
+    delimiter: str
+    coerce: Callable[[str], tuple[str | None, list[str]]] | None = field(compare=False)
+    build_argv: Callable[[str], tuple[str, ...]] = field(compare=False)
+    build_env: Callable[[str], EnvMap] = field(compare=False)
+
+
+def build_injection_plan(injector: Injector) -> InjectionPlan:
+    """Specialise value coercion and argv/env construction for an injector."""
+    kind = injector.kind
+    aliases = injector.aliases
+    target_type = injector.type
+
+    coerce = None
+    if target_type:
+
+        def coerce(value: str) -> tuple[str | None, list[str]]:
+            return _coerce_type(value, target_type, injector)
+
+    applied_aliases: list[str] = []
+    build_argv = _no_argv
+    build_env = _no_env
+
+    if kind == "env_var":
+        applied_aliases = aliases
+
+        def build_env(value: str) -> EnvMap:
+            return dict.fromkeys(aliases, value)
+
+    elif kind == "named" and aliases:
+        applied_aliases = aliases
+        alias = aliases[0]  # Use first alias
+        if injector.connector == "=":
+
+            def build_argv(value: str) -> tuple[str, ...]:
+                return (f"{alias}={value}",)
+
+        else:  # space or repeat
+
+            def build_argv(value: str) -> tuple[str, ...]:
+                return (alias, value)
+
+    elif kind == "positional":
+
+        def build_argv(value: str) -> tuple[str, ...]:
+            return (value,)
+
+    # stdin_fragment values are aggregated by build_env_and_argv
+
+    # Without sources a constant default is always the resolved value, so
+    # it is coerced once here. Paths are left to resolve time since they
+    # must exist then, as are defaults that fail coercion so the errors
+    # are reported each time.
+    default = injector.default
+    default_value = None if default is None else str(default)
+    default_needs_expand = isinstance(default, str) and _TOKEN_START in default
+    static_value = None
+    if (
+        not injector.sources
+        and target_type != "path"
+        and default_value is not None
+        and isinstance(default, str | int | float | bool)
+        and not default_needs_expand
+    ):
+        static_value, errors = (
+            coerce(default_value) if coerce is not None else (default_value, [])
+        )
+        if errors:
+            static_value = None
+
+    return InjectionPlan(
+        kind=kind,
+        static_value=static_value,
+        default_value=default_value,
+        default_needs_expand=default_needs_expand,
+        applied_aliases=applied_aliases,
+        target_type=target_type,
+        connector=injector.connector,
+        delimiter=injector.delimiter,
+        coerce=coerce,
+        build_argv=build_argv,
+        build_env=build_env,
+    )
+
+
+def _no_argv(_value: str) -> tuple[str, ...]:
+    """Argv builder for injectors that add no arguments."""
+    return ()
+
+
+def _no_env(_value: str) -> EnvMap:
+    """Env builder for injectors that set no variables."""
+    return {}
+
+
 def _resolve_value(
     injector: Injector,
     _context: RuntimeContext,
@@ -152,7 +272,9 @@ def _resolve_value(
     for source in injector.sources:
         # Expand tokens in source
         if isinstance(source, str):
-            expanded_source = token_engine.expand(source)
+            expanded_source = (
+                token_engine.expand(source) if _TOKEN_START in source else source
+            )
         else:
             expanded_source = str(source)
 
@@ -164,10 +286,11 @@ def _resolve_value(
             return expanded_source
 
     # No non-empty source found, use default
-    if injector.default is not None:
-        if isinstance(injector.default, str):
-            return token_engine.expand(injector.default)
-        return str(injector.default)
+    plan = injector.plan
+    if plan.default_value is not None:
+        if plan.default_needs_expand:
+            return token_engine.expand(plan.default_value)
+        return plan.default_value
 
     # No default, check if required
     if injector.required:
@@ -176,49 +299,62 @@ def _resolve_value(
     return None
 
 
+def build_eval_context(
+    context: RuntimeContext, providers: ProviderMaps
+) -> dict[str, Any]:
+    """Build the variables available to ``when`` conditions.
+
+    Includes the environment, every provider value under its bare key and
+    prefixed with its provider id, and ``HOME`` and ``PID``.
+    """
+    eval_context = dict(context.env)
+
+    # Add provider values to context (flattened)
+    for provider_id, provider_map in providers.items():
+        for key, value in provider_map.items():
+            # Use the key directly and also with provider prefix
+            eval_context[key] = value
+            eval_context[f"{provider_id}_{key}"] = value
+
+    # Add runtime context values
+    eval_context["HOME"] = str(context.home)
+    eval_context["PID"] = str(context.pid)
+
+    return eval_context
+
+
 def _evaluate_condition(
     condition: str,
     context: RuntimeContext,
     providers: ProviderMaps,
     token_engine: TokenEngine,
+    eval_context: dict[str, Any] | None = None,
 ) -> bool:
     """Evaluate a conditional expression using the proper expression parser."""
-    from .expression_parser import ExpressionError, evaluate_expression
-
     try:
         # Expand tokens in condition first
-        expanded_condition = token_engine.expand(condition)
-
-        # Build evaluation context from runtime context and providers
-        eval_context = {}
-
-        # Add environment variables to context
-        eval_context.update(context.env)
-
-        # Add provider values to context (flattened)
-        for provider_id, provider_map in providers.items():
-            for key, value in provider_map.items():
-                # Use the key directly and also with provider prefix
-                eval_context[key] = value
-                eval_context[f"{provider_id}_{key}"] = value
+        expanded_condition = (
+            token_engine.expand(condition) if _TOKEN_START in condition else condition
+        )
 
-        # Add runtime context values
-        eval_context["HOME"] = str(context.home)
-        eval_context["PID"] = str(context.pid)
+        if eval_context is None:
+            eval_context = build_eval_context(context, providers)
 
         # Evaluate using the proper expression parser
         return evaluate_expression(expanded_condition, eval_context)
 
     except ExpressionError as e:
         # Log the error but fall back to the old simple evaluation for backward compatibility
-        print(
-            f"Warning: Expression evaluation failed, falling back to simple evaluation: {e}"
+        logger.warning(
+            "Expression evaluation failed, falling back to simple evaluation: %s", e
         )
         return _evaluate_condition_simple(expanded_condition)
     except Exception as e:
         # Unexpected error, fall back to simple evaluation
-        print(
-            f"Warning: Unexpected error in expression evaluation, falling back to simple evaluation: {e}"
+        logger.warning(
+            "Unexpected error in expression evaluation, "
+            "falling back to simple evaluation: %s",
+            e,
         )
         return _evaluate_condition_simple(expanded_condition)
 
@@ -226,9 +362,10 @@ def _evaluate_condition(
 def _evaluate_condition_simple(expanded_condition: str) -> bool:
     """Simple fallback condition evaluation for backward compatibility."""
     # Simple boolean evaluation
-    if expanded_condition.lower() in ("true", "1", "yes", "on"):
+    lowered = expanded_condition.lower()
+    if lowered in _TRUTHY:
         return True
-    elif expanded_condition.lower() in ("false", "0", "no", "off", ""):
+    elif not lowered or lowered in _FALSY:
         return False
 
     # Simple equality check: "value == expected"
@@ -261,70 +398,131 @@ def _coerce_type(
     value: str, target_type: str, injector: Injector | None = None
 ) -> tuple[str | None, list[str]]:
     """Coerce a string value to the target type."""
-    errors: list[str] = []
+    coercer = _COERCERS.get(target_type)
+    if coercer is None:
+        return None, [f"Unknown type: {target_type}"]
 
     try:
-        if target_type == "string":
-            return value, errors
-
-        elif target_type == "int":
-            int(value)
-            return value, errors
-
-        elif target_type == "bool":
-            # Normalize boolean values
-            if value.lower() in ("true", "1", "yes", "on"):
-                return "true", errors
-            elif value.lower() in ("false", "0", "no", "off"):
-                return "false", errors
-            else:
-                errors.append(f"Invalid boolean value: {value}")
-                return None, errors
-
-        elif target_type == "path":
-            # Validate path existence
-            path = Path(value)
-
-            # Check if path exists
-            if not path.exists():
-                errors.append(f"Path does not exist: {value}")
-                return None, errors
-
-            # Return the normalized absolute path
-            return str(path.resolve()), errors
-
-        elif target_type == "list":
-            # Use configurable delimiter, default to comma for backward compatibility
-            delimiter = "," if injector is None else injector.delimiter
-            items = [item.strip() for item in value.split(delimiter)]
-            return json.dumps(items), errors
-
-        elif target_type == "json":
-            # Validate JSON
-            json.loads(value)
-            return value, errors
+        return coercer(value, injector)
+    except (ValueError, json.JSONDecodeError) as e:
+        return None, [f"Type coercion failed: {e}"]
 
-        else:
-            errors.append(f"Unknown type: {target_type}")
-            return None, errors
 
-    except (ValueError, json.JSONDecodeError) as e:
-        errors.append(f"Type coercion failed: {e}")
-        return None, errors
+def _coerce_string(
+    value: str, _injector: Injector | None
+) -> tuple[str | None, list[str]]:
+    """Accept any string unchanged."""
+    return value, []
 
 
-def _create_temp_file(content: str, injector: Injector) -> Path:
-    """Create a temporary file with the given content."""
-    # Create temporary file
-    suffix = ".tmp"
-    if injector.type == "json" or (
-        injector.type == "path" and (content.startswith("{") or content.startswith("["))
-    ):
+def _coerce_int(value: str, _injector: Injector | None) -> tuple[str | None, list[str]]:
+    """Validate that the value is an integer."""
+    int(value)
+    return value, []
+
+
+def _coerce_bool(
+    value: str, _injector: Injector | None
+) -> tuple[str | None, list[str]]:
+    """Normalize boolean spellings to "true" or "false"."""
+    lowered = value.lower()
+    if lowered in _TRUTHY:
+        return "true", []
+    elif lowered in _FALSY:
+        return "false", []
+    return None, [f"Invalid boolean value: {value}"]
+
+
+def _coerce_path(
+    value: str, _injector: Injector | None
+) -> tuple[str | None, list[str]]:
+    """Require an existing path and return it absolute."""
+    # An empty value means the current directory, as it does for Path
+    path = value or "."
+    try:
+        os.stat(path)
+    except OSError:
+        return None, [f"Path does not exist: {value}"]
+
+    # Return the normalized absolute path
+    return os.path.realpath(path), []
+
+
+def _coerce_list(value: str, injector: Injector | None) -> tuple[str | None, list[str]]:
+    """Split on the injector's delimiter into a JSON array of strings."""
+    # Use configurable delimiter, default to comma for backward compatibility
+    delimiter = "," if injector is None else injector.delimiter
+    items = list(map(str.strip, value.split(delimiter)))
+    return json.dumps(items), []
+
+
+def _coerce_json(
+    value: str, _injector: Injector | None
+) -> tuple[str | None, list[str]]:
+    """Validate that the value is JSON."""
+    json.loads(value)
+    return value, []
+
+
+# Coercion function for each injector type. Each returns the coerced value
+# and any errors, and may raise ValueError for values it cannot convert.
+_COERCERS: dict[str, Callable[[str, Injector | None], tuple[str | None, list[str]]]] = {
+    "string": _coerce_string,
+    "int": _coerce_int,
+    "bool": _coerce_bool,
+    "path": _coerce_path,
+    "list": _coerce_list,
+    "json": _coerce_json,
+}
+
+
+# Temporary file suffix by injector type; anything else uses ".tmp"
+_TEMP_FILE_SUFFIXES = {"json": ".json"}
+
+# First character of JSON objects and arrays, as text and as bytes
+_JSON_STARTS = frozenset({"{", "[", b"{", b"["})
+
+# Temporary files get random names so others can't pre-create them; O_EXCL
+# makes creation fail rather than reuse or follow an existing file
+_TEMP_FILE_FLAGS = (
+    os.O_WRONLY
+    | os.O_CREAT
+    | os.O_EXCL
+    | getattr(os, "O_NOFOLLOW", 0)
+    | getattr(os, "O_BINARY", 0)
+)
+
+
+def _create_temp_file(content: str | bytes, injector: Injector) -> Path:
+    """Create a temporary file with the given content.
+
+    Bytes are written as-is; strings are encoded as UTF-8. The file is only
+    readable by the current user, like those from tempfile.mkstemp().
+    """
+    suffix = _TEMP_FILE_SUFFIXES.get(injector.type, ".tmp")
+    if injector.type == "path" and content.lstrip()[:1] in _JSON_STARTS:
         suffix = ".json"
 
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=suffix, delete=False, encoding="utf-8"
-    ) as temp_file:
-        temp_file.write(content)
-        temp_file.flush()
-        return Path(temp_file.name)
+    data = content if isinstance(content, bytes) else content.encode("utf-8")
+    temp_dir = tempfile.gettempdir()
+    while True:
+        name = f"config_injector_{secrets.token_hex(8)}{suffix}"
+        path = os.path.join(temp_dir, name)
+        try:
+            fd = os.open(path, _TEMP_FILE_FLAGS, 0o600)
+        except FileExistsError:
+            # Name already taken; try another
+            continue
+        break
+
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    except BaseException:
+        # Don't leave a partial file behind; its path is never returned
+        os.close(fd)
+        os.unlink(path)
+        raise
+    os.close(fd)
+    return Path(path)
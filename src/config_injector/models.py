@@ -3,14 +3,116 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Literal
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Literal
 
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    field_validator,
+    model_validator,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .injectors import InjectionPlan
+
+# Contents of ${...} tokens; the lookahead also finds tokens nested in others
+_COMMAND_TOKEN_RE = re.compile(r"(?=\$\{([^}]*)\})")
+
+
+@lru_cache(maxsize=256)
+def _command_tokens(command: tuple[str, ...]) -> frozenset[str]:
+    """Collect the contents of every ``${...}`` token in a command."""
+    return frozenset(_COMMAND_TOKEN_RE.findall(" ".join(command)))
+
+
+# One filter step: whether it includes (else excludes) keys, its pattern,
+# and the first characters a matching key can have (None if unknown)
+FilterStep = tuple[bool, re.Pattern[str], frozenset[str] | None]
+
+
+@lru_cache(maxsize=256)
+def _compile_filter_steps(
+    rules: tuple[tuple[str | None, str | None], ...],
+) -> tuple[FilterStep, ...]:
+    """Compile (include, exclude) pattern pairs into ordered filter steps.
+
+    Consecutive patterns of the same kind are fused into one alternation so
+    each key is matched once per run rather than once per pattern.
+    """
+    ops = [
+        (include, pattern)
+        for include_pattern, exclude_pattern in rules
+        for include, pattern in ((True, include_pattern), (False, exclude_pattern))
+        if pattern
+    ]
+
+    steps: list[FilterStep] = []
+    for include, run in groupby(ops, key=itemgetter(0)):
+        steps.extend(
+            (include, pattern, first_chars)
+            for pattern, first_chars in _fuse_patterns(run)
+        )
+    return tuple(steps)
+
+
+def _fuse_patterns(
+    run: Iterable[tuple[bool, str]],
+) -> list[tuple[re.Pattern[str], frozenset[str] | None]]:
+    """Compile a run of patterns, fusing those that can share one regex.
+
+    Patterns with groups are kept apart since fusing would renumber their
+    backreferences, and nothing is fused if the alternation doesn't compile
+    (e.g. inline global flags). Each pattern comes with its possible first
+    characters from _first_chars().
+    """
+    compiled = [re.compile(pattern) for _, pattern in run]
+    separate = [(pattern, _first_chars(pattern.pattern)) for pattern in compiled]
+    plain = [pattern.pattern for pattern in compiled if not pattern.groups]
+    if len(plain) < 2:
+        return separate
+    try:
+        fused = re.compile("|".join(f"(?:{pattern})" for pattern in plain))
+    except re.error:
+        return separate
+
+    first_chars: frozenset[str] | None = frozenset()
+    for pattern in plain:
+        chars = _first_chars(pattern)
+        if chars is None:
+            first_chars = None
+            break
+        first_chars |= chars
+    return [(fused, first_chars), *(item for item in separate if item[0].groups)]
+
+
+def _first_chars(pattern: str) -> frozenset[str] | None:
+    """Return the characters a match of ``pattern`` must start with.
+
+    Only recognises patterns that begin with a required literal letter,
+    digit or underscore, optionally after ``^``. Returns None otherwise.
+    """
+    body = pattern.removeprefix("^")
+    first = body[:1]
+    if not (first.isalnum() or first == "_") or "|" in body:
+        return None
+    # The literal may be optional or repeated
+    if body[1:2] in ("?", "*", "{"):
+        return None
+    return frozenset(first)
 
 
 class FilterRule(BaseModel):
     """Filter rule for provider key filtering."""
 
+    model_config = ConfigDict(frozen=True)
+
     include: str | None = None
     exclude: str | None = None
 
@@ -62,9 +164,34 @@ class Provider(BaseModel):
         self.filter_chain = normalized_chain  # type: ignore[assignment]
         return self
 
+    @property
+    def compiled_filter(self) -> tuple[FilterStep, ...]:
+        """The filter chain as ordered ``(include, pattern, first_chars)`` steps.
+
+        Keys matching an include step are added to the result and keys
+        matching an exclude step are removed from what has been included so
+        far, in order. Compiled steps are shared between providers with the
+        same patterns.
+        """
+        rules: list[tuple[str | None, str | None]] = []
+        for item in self.filter_chain:
+            if isinstance(item, FilterRule):
+                rules.append((item.include, item.exclude))
+            elif isinstance(item, dict):
+                rules.append((item.get("include"), item.get("exclude")))
+            else:
+                rules.append((item, None))
+        return _compile_filter_steps(tuple(rules))
+
 
 class Injector(BaseModel):
-    """Configuration injector definition."""
+    """Configuration injector definition.
+
+    Injectors are immutable so the plan derived from them at construction
+    stays accurate.
+    """
+
+    model_config = ConfigDict(frozen=True)
 
     name: str
     kind: Literal["env_var", "named", "positional", "file", "stdin_fragment"]
@@ -80,6 +207,20 @@ class Injector(BaseModel):
     connector: Literal["=", "space", "repeat"] | None = "="
     delimiter: str = ","  # Delimiter for list type coercion
 
+    # Derived from the fields above once, when the injector is constructed
+    _plan: InjectionPlan = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        """Build the injection plan used when resolving this injector."""
+        from .injectors import build_injection_plan
+
+        self._plan = build_injection_plan(self)
+
+    @property
+    def plan(self) -> InjectionPlan:
+        """Specialised coercion and argv/env builders for this injector."""
+        return self._plan
+
 
 class Stream(BaseModel):
     """Output stream configuration."""
@@ -113,3 +254,10 @@ class Spec(BaseModel):
     target: Target
     profiles: dict[str, Any] | None = None  # extension
     validation: dict[str, Any] | None = None  # extension
+
+    # Computed on access since the command may change after construction
+    # (profiles are applied with setattr); the scan itself is memoised
+    @property
+    def command_tokens(self) -> frozenset[str]:
+        """Contents of every ``${...}`` token in the target command."""
+        return _command_tokens(tuple(self.target.command))
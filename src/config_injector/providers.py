@@ -2,15 +2,18 @@
 
 from __future__ import annotations
 
+import io
+import os
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Protocol
 
-from .models import FilterRule
-
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from .core import RuntimeContext
-    from .models import Provider
+    from .models import FilterStep, Provider
     from .types import EnvMap, ProviderMap, ProviderMaps
 
 # Try to import bitwarden_sdk classes at the module level
@@ -35,7 +38,68 @@ class ProviderProtocol(Protocol):
         ...
 
 
-class EnvProvider:
+class _FilterChainMixin:
+    """Filtering of loaded values through the provider's filter_chain.
+
+    The chain is compiled on first use and kept for the lifetime of the
+    provider object.
+    """
+
+    provider: Provider
+    _filter_steps: tuple[FilterStep, ...] | None = None
+
+    def _get_filter_steps(self) -> tuple[FilterStep, ...]:
+        """Return the compiled filter chain, compiling it on first use."""
+        if self._filter_steps is None:
+            self._filter_steps = self.provider.compiled_filter
+        return self._filter_steps
+
+    def _apply_filters(self, env_map: EnvMap) -> EnvMap:
+        """Apply filter chain to environment map."""
+        return _apply_filter_chain(env_map, self._get_filter_steps())
+
+
+def _apply_filter_chain(
+    env_map: EnvMap,
+    filter_steps: tuple[FilterStep, ...],
+    normalize: Callable[[str], str] | None = None,
+) -> EnvMap:
+    """Apply compiled filter steps to a map of loaded values.
+
+    Patterns are matched against ``normalize(key)`` when given, which is
+    computed once per key rather than once per step.
+    """
+    match_keys = None if normalize is None else {k: normalize(k) for k in env_map}
+
+    # Start with empty set and accumulate
+    included_keys: set[str] = set()
+
+    for include, pattern, first_chars in filter_steps:
+        keys = env_map if include else included_keys
+        if match_keys is not None:
+            matched = {
+                key
+                for key in keys
+                if (first_chars is None or match_keys[key][:1] in first_chars)
+                and pattern.match(match_keys[key])
+            }
+        elif first_chars is None:
+            matched = set(filter(pattern.match, keys))
+        else:
+            # Skip the regex for keys that can't start a match
+            matched = {
+                key for key in keys if key[:1] in first_chars and pattern.match(key)
+            }
+        if include:
+            included_keys |= matched
+        else:
+            included_keys -= matched
+
+    # Walk env_map rather than the set so values keep the source's order
+    return {k: v for k, v in env_map.items() if k in included_keys}
+
+
+class EnvProvider(_FilterChainMixin):
     """Environment variable provider."""
 
     def __init__(self, provider: Provider):
@@ -44,59 +108,16 @@ class EnvProvider:
 
     def load(self, context: RuntimeContext) -> ProviderMap:
         """Load environment variables."""
-        env_map = context.env.copy()
+        env_map = dict(context.env)
 
         # Apply filters
         if self.provider.filter_chain:
-            env_map = self._apply_filters(env_map, self.provider.filter_chain)
+            env_map = self._apply_filters(env_map)
 
         return env_map
 
-    def _apply_filters(
-        self, env_map: EnvMap, filter_chain: list[FilterRule | dict[str, str] | str]
-    ) -> EnvMap:
-        """Apply filter chain to environment map."""
-        # Start with empty set and accumulate
-        included_keys = set()
-
-        for rule in filter_chain:
-            if isinstance(rule, FilterRule):
-                if rule.include:
-                    pattern = re.compile(rule.include)
-                    for key in env_map:
-                        if pattern.match(key):
-                            included_keys.add(key)
-
-                if rule.exclude:
-                    pattern = re.compile(rule.exclude)
-                    for key in list(included_keys):
-                        if pattern.match(key):
-                            included_keys.discard(key)
-            elif isinstance(rule, dict):
-                # Convert dict to FilterRule
-                filter_rule = FilterRule(**rule)
-                if filter_rule.include:
-                    pattern = re.compile(filter_rule.include)
-                    for key in env_map:
-                        if pattern.match(key):
-                            included_keys.add(key)
-
-                if filter_rule.exclude:
-                    pattern = re.compile(filter_rule.exclude)
-                    for key in list(included_keys):
-                        if pattern.match(key):
-                            included_keys.discard(key)
-            elif isinstance(rule, str):
-                # Treat string as include pattern
-                pattern = re.compile(rule)
-                for key in env_map:
-                    if pattern.match(key):
-                        included_keys.add(key)
-
-        return {k: v for k, v in env_map.items() if k in included_keys}
-
-
-class DotenvProvider:
+
+class DotenvProvider(_FilterChainMixin):
     """Dotenv file provider."""
 
     def __init__(self, provider: Provider):
@@ -112,8 +133,6 @@ class DotenvProvider:
 
     def _load_single(self, context: RuntimeContext) -> ProviderMap:
         """Load a single dotenv file."""
-        from dotenv import dotenv_values
-
         if self.provider.path:
             env_file = Path(self.provider.path)
         elif self.provider.filename:
@@ -123,16 +142,13 @@ class DotenvProvider:
         else:
             return {}
 
-        if not env_file.exists():
+        env_map = _read_dotenv(env_file)
+        if env_map is None:
             return {}
 
-        # Load dotenv values and filter out None values
-        raw_env_map = dict(dotenv_values(env_file))
-        env_map = {k: str(v) for k, v in raw_env_map.items() if v is not None}
-
         # Apply filters
         if self.provider.filter_chain:
-            env_map = self._apply_filters(env_map, self.provider.filter_chain)
+            env_map = self._apply_filters(env_map)
 
         return env_map
 
@@ -141,28 +157,14 @@ class DotenvProvider:
         if not self.provider.filename:
             return {}
 
-        # Find all matching files by walking up the directory tree
-        working_dir = Path(context.extra.get("working_dir", "."))
-        filename = self.provider.filename
-        files = []
-
-        # Walk up the directory tree from working_dir
-        current_dir = working_dir.resolve()
-        while current_dir.exists():
-            env_file = current_dir / filename
-            if env_file.exists():
-                files.append(env_file)
-            # Move up one level
-            parent = current_dir.parent
-            if parent == current_dir:  # Reached root directory
-                break
-            current_dir = parent
-
-        if not files:
+        # Candidate files from the filesystem root down to working_dir
+        working_dir = Path(context.extra.get("working_dir", ".")).resolve()
+        if not working_dir.exists():
             return {}
-
-        # Sort files by depth (shallowest first)
-        files.sort(key=lambda f: len(f.parts))
+        filename = self.provider.filename
+        files = [directory / filename for directory in working_dir.parents]
+        files.reverse()
+        files.append(working_dir / filename)
 
         # Merge files based on precedence
         precedence = self.provider.precedence or "deep-first"
@@ -171,75 +173,114 @@ class DotenvProvider:
     def _merge_hierarchical_dotenv(
         self, files: list[Path], precedence: str
     ) -> ProviderMap:
-        """Merge hierarchical dotenv files."""
-        from dotenv import dotenv_values
-
-        merged = {}
-
-        if precedence == "deep-first":
-            # Deepest files override shallowest
-            for file_path in files:
-                raw_file_env = dict(dotenv_values(file_path))
-                file_env = {k: str(v) for k, v in raw_file_env.items() if v is not None}
-                merged.update(file_env)
-        else:
-            # Shallowest files override deepest (default)
-            for file_path in reversed(files):
-                raw_file_env = dict(dotenv_values(file_path))
-                file_env = {k: str(v) for k, v in raw_file_env.items() if v is not None}
+        """Merge hierarchical dotenv files, given shallowest first.
+
+        Files that don't exist are skipped.
+        """
+        merged: dict[str, str] = {}
+
+        # deep-first: deepest files override shallowest; otherwise the
+        # shallowest files override deepest
+        ordered = files if precedence == "deep-first" else reversed(files)
+        for file_path in ordered:
+            file_env = _read_dotenv(file_path)
+            if file_env is not None:
                 merged.update(file_env)
 
         # Apply filters
         if self.provider.filter_chain:
-            merged = self._apply_filters(merged, self.provider.filter_chain)
+            merged = self._apply_filters(merged)
 
         return merged
 
-    def _apply_filters(
-        self, env_map: EnvMap, filter_chain: list[FilterRule | dict[str, str] | str]
-    ) -> EnvMap:
-        """Apply filter chain to environment map."""
-        # Start with empty set and accumulate
-        included_keys = set()
-
-        for rule in filter_chain:
-            if isinstance(rule, FilterRule):
-                if rule.include:
-                    pattern = re.compile(rule.include)
-                    for key in env_map:
-                        if pattern.match(key):
-                            included_keys.add(key)
-
-                if rule.exclude:
-                    pattern = re.compile(rule.exclude)
-                    for key in list(included_keys):
-                        if pattern.match(key):
-                            included_keys.discard(key)
-            elif isinstance(rule, dict):
-                # Convert dict to FilterRule
-                filter_rule = FilterRule(**rule)
-                if filter_rule.include:
-                    pattern = re.compile(filter_rule.include)
-                    for key in env_map:
-                        if pattern.match(key):
-                            included_keys.add(key)
-
-                if filter_rule.exclude:
-                    pattern = re.compile(filter_rule.exclude)
-                    for key in list(included_keys):
-                        if pattern.match(key):
-                            included_keys.discard(key)
-            elif isinstance(rule, str):
-                # Treat string as include pattern
-                pattern = re.compile(rule)
-                for key in env_map:
-                    if pattern.match(key):
-                        included_keys.add(key)
-
-        return {k: v for k, v in env_map.items() if k in included_keys}
-
-
-class BwsProvider:
+
+# Characters that need python-dotenv's full parser: quotes, escapes,
+# interpolation and carriage returns outside CRLF line endings
+_DOTENV_SPECIAL_CHARS = frozenset("\"'\\$\r")
+
+# Unquoted dotenv values end at whitespace followed by #
+_DOTENV_INLINE_COMMENT_RE = re.compile(r"\s+#.*")
+
+
+def _read_dotenv(path: Path) -> dict[str, str] | None:
+    """Parse a dotenv file, dropping keys without values.
+
+    Returns None if the file doesn't exist, so callers need no separate
+    existence check. Parses are cached by path, modification time and size;
+    files using ``$`` interpolation are reparsed each time since their values
+    can depend on the process environment.
+    """
+    try:
+        st = os.stat(path)
+        abspath = os.path.abspath(path)
+        env_map, interpolates = _parse_dotenv_cached(
+            abspath, st.st_mtime_ns, st.st_size
+        )
+        if interpolates:
+            env_map, _ = _parse_dotenv(abspath)
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return None
+    return dict(env_map)
+
+
+@lru_cache(maxsize=256)
+def _parse_dotenv_cached(
+    path: str, _mtime_ns: int, _size: int
+) -> tuple[dict[str, str], bool]:
+    """Parse a dotenv file; cached by ``_read_dotenv``."""
+    return _parse_dotenv(path)
+
+
+def _parse_dotenv(path: str) -> tuple[dict[str, str], bool]:
+    """Parse a dotenv file and report whether it may interpolate variables."""
+    with open(path, encoding="utf-8") as stream:
+        content = stream.read()
+
+    env_map = _parse_simple_dotenv(content)
+    if env_map is None:
+        from dotenv import dotenv_values
+
+        raw_env_map = dotenv_values(stream=io.StringIO(content))
+        env_map = {k: str(v) for k, v in raw_env_map.items() if v is not None}
+    return env_map, "$" in content
+
+
+def _parse_simple_dotenv(content: str) -> dict[str, str] | None:
+    """Parse dotenv content made only of plain ``KEY=value`` lines.
+
+    Gives the same result as python-dotenv for blank lines, comments and
+    unquoted values with inline comments. Returns None for anything else
+    (quotes, escapes, interpolation, ``export``, keys that aren't
+    identifiers) so the caller can fall back to python-dotenv.
+    """
+    content = content.replace("\r\n", "\n")
+    if _DOTENV_SPECIAL_CHARS.intersection(content):
+        return None
+
+    env_map: dict[str, str] = {}
+    for line in content.split("\n"):
+        line = line.strip()
+        if not line or line[0] == "#":
+            continue
+        key, sep, value = line.partition("=")
+        key = key.rstrip()
+        if not sep or not key.isidentifier() or key == "export":
+            return None
+        stripped_value = value.lstrip()
+        if stripped_value[:1] == "#" and len(stripped_value) < len(value):
+            # "KEY= # comment" has an empty value
+            env_map[key] = ""
+        else:
+            env_map[key] = _DOTENV_INLINE_COMMENT_RE.sub("", stripped_value).rstrip()
+    return env_map
+
+
+# Environment variables whose values are Bitwarden secret IDs
+_SECRET_ID_PREFIXES = ("BWS_SECRET_", "BITWARDEN_SECRET_")
+_SECRET_ID_KEYS = frozenset({"BWS_SECRET_ID", "BITWARDEN_SECRET"})
+
+
+class BwsProvider(_FilterChainMixin):
     """Bitwarden Secrets Manager provider."""
 
     def __init__(self, provider: Provider):
@@ -272,7 +313,7 @@ class BwsProvider:
 
         # Apply filters
         if self.provider.filter_chain:
-            env_map = self._apply_filters(env_map, self.provider.filter_chain)
+            env_map = self._apply_filters(env_map)
 
         return env_map
 
@@ -316,7 +357,7 @@ class BwsProvider:
 
             # Apply filters
             if self.provider.filter_chain:
-                env_map = self._apply_filters(env_map, self.provider.filter_chain)
+                env_map = self._apply_filters(env_map)
 
             return env_map
 
@@ -330,68 +371,24 @@ class BwsProvider:
 
         # Look for environment variables that might contain secret IDs
         for key, value in context.env.items():
-            if (
-                key.startswith("BWS_SECRET_")
-                or key.startswith("BITWARDEN_SECRET_")
-                or key == "BWS_SECRET_ID"
-                or key == "BITWARDEN_SECRET"
-            ) and value:
+            if value and (
+                key.startswith(_SECRET_ID_PREFIXES) or key in _SECRET_ID_KEYS
+            ):
                 secret_ids.append(value)
 
         return secret_ids
 
-    def _apply_filters(
-        self, env_map: EnvMap, filter_chain: list[FilterRule | dict[str, str] | str]
-    ) -> EnvMap:
+    def _apply_filters(self, env_map: EnvMap) -> EnvMap:
         """Apply filter chain to environment map."""
-        # Start with empty set and accumulate
-        included_keys = set()
-
-        for rule in filter_chain:
-            if isinstance(rule, FilterRule):
-                if rule.include:
-                    pattern = re.compile(rule.include)
-                    for key in env_map:
-                        # Convert normalized key back to original format for pattern matching
-                        original_key = key.upper().replace("-", "_")
-                        if pattern.match(original_key):
-                            included_keys.add(key)
-
-                if rule.exclude:
-                    pattern = re.compile(rule.exclude)
-                    for key in list(included_keys):
-                        # Convert normalized key back to original format for pattern matching
-                        original_key = key.upper().replace("-", "_")
-                        if pattern.match(original_key):
-                            included_keys.discard(key)
-            elif isinstance(rule, dict):
-                # Convert dict to FilterRule
-                filter_rule = FilterRule(**rule)
-                if filter_rule.include:
-                    pattern = re.compile(filter_rule.include)
-                    for key in env_map:
-                        # Convert normalized key back to original format for pattern matching
-                        original_key = key.upper().replace("-", "_")
-                        if pattern.match(original_key):
-                            included_keys.add(key)
-
-                if filter_rule.exclude:
-                    pattern = re.compile(filter_rule.exclude)
-                    for key in list(included_keys):
-                        # Convert normalized key back to original format for pattern matching
-                        original_key = key.upper().replace("-", "_")
-                        if pattern.match(original_key):
-                            included_keys.discard(key)
-            elif isinstance(rule, str):
-                # Treat string as include pattern
-                pattern = re.compile(rule)
-                for key in env_map:
-                    # Convert normalized key back to original format for pattern matching
-                    original_key = key.upper().replace("-", "_")
-                    if pattern.match(original_key):
-                        included_keys.add(key)
-
-        return {k: v for k, v in env_map.items() if k in included_keys}
+        # Convert normalized keys back to original format for pattern matching
+        return _apply_filter_chain(
+            env_map, self._get_filter_steps(), _original_secret_key
+        )
+
+
+def _original_secret_key(key: str) -> str:
+    """Undo the BWS key normalization (e.g. bws-api-key -> BWS_API_KEY)."""
+    return key.upper().replace("-", "_")
 
 
 def create_provider(provider: Provider) -> ProviderProtocol:
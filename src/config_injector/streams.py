@@ -9,7 +9,11 @@ from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+from .types import compile_masker
+
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from .core import RuntimeContext
     from .models import Spec, Stream
     from .token_engine import TokenEngine
@@ -41,6 +45,7 @@ class StreamWriter:
 
         # Sensitive values to mask in output
         self.sensitive_values: list[str] = []
+        self._mask: Callable[[str], str] | None = None
 
         # Open files if needed
         if self.stdout_config and self.stdout_config.path:
@@ -55,22 +60,30 @@ class StreamWriter:
                 self.stderr_config.path, mode, encoding="utf-8"
             )
 
+    @property
+    def forwards_stdout(self) -> bool:
+        """Return whether stdout data is written to a file or the terminal."""
+        return self.stdout_file is not None or bool(
+            self.stdout_config and self.stdout_config.tee_terminal
+        )
+
+    @property
+    def forwards_stderr(self) -> bool:
+        """Return whether stderr data is written to a file or the terminal."""
+        return self.stderr_file is not None or bool(
+            self.stderr_config and self.stderr_config.tee_terminal
+        )
+
     def register_sensitive_values(self, values: list[str]) -> None:
         """Register sensitive values that should be masked in output."""
         self.sensitive_values.extend([v for v in values if v])
+        self._mask = compile_masker(self.sensitive_values)
 
     def _mask_sensitive_data(self, text: str) -> str:
         """Mask sensitive values in text."""
-        from .types import MASKED_VALUE
-
-        if not self.sensitive_values:
+        if self._mask is None:
             return text
-
-        masked_text = text
-        for value in self.sensitive_values:
-            if value in masked_text:
-                masked_text = masked_text.replace(value, MASKED_VALUE)
-        return masked_text
+        return self._mask(text)
 
     def write_stdout(self, data: bytes) -> None:
         """Write data to stdout stream."""
@@ -84,15 +97,8 @@ class StreamWriter:
         if self.stdout_file and self.stdout_config:
             if self.stdout_config.format == "json":
                 # Write as JSON lines
-                for line in masked_text.splitlines():
-                    if line.strip():
-                        json_line = {
-                            "ts": datetime.now().isoformat(),
-                            "stream": "stdout",
-                            "msg": line.strip(),
-                        }
-                        self.stdout_file.write(json.dumps(json_line) + "\n")
-                        self.stdout_file.flush()
+                self.stdout_file.write(_format_json_lines(masked_text, "stdout"))
+                self.stdout_file.flush()
             else:
                 # Write as plain text
                 self.stdout_file.write(masked_text)
@@ -115,15 +121,8 @@ class StreamWriter:
         if self.stderr_file and self.stderr_config:
             if self.stderr_config.format == "json":
                 # Write as JSON lines
-                for line in masked_text.splitlines():
-                    if line.strip():
-                        json_line = {
-                            "ts": datetime.now().isoformat(),
-                            "stream": "stderr",
-                            "msg": line.strip(),
-                        }
-                        self.stderr_file.write(json.dumps(json_line) + "\n")
-                        self.stderr_file.flush()
+                self.stderr_file.write(_format_json_lines(masked_text, "stderr"))
+                self.stderr_file.flush()
             else:
                 # Write as plain text
                 self.stderr_file.write(masked_text)
@@ -142,6 +141,16 @@ class StreamWriter:
             self.stderr_file.close()
 
 
+def _format_json_lines(text: str, stream_name: str) -> str:
+    """Format each non-blank line of a chunk as a JSON log record."""
+    ts = datetime.now().isoformat()
+    return "".join(
+        json.dumps({"ts": ts, "stream": stream_name, "msg": stripped}) + "\n"
+        for line in text.splitlines()
+        if (stripped := line.strip())
+    )
+
+
 def prepare_stream(
     stream: Stream | None,
     _context: RuntimeContext,
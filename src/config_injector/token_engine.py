@@ -7,9 +7,18 @@ import uuid
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
     from .core import RuntimeContext
     from .types import ProviderMaps
 
+# Matches a ${...} token and captures its content
+_TOKEN_RE = re.compile(r"\$\{([^}]+)\}")
+
+# Tokens that expand to a different value on each use (or as the runtime
+# sequence counter advances) and therefore must never be cached
+_VOLATILE_TOKENS = ("${UUID", "${SEQ")
+
 
 class TokenEngine:
     """Engine for expanding ${...} tokens in strings."""
@@ -23,33 +32,90 @@ class TokenEngine:
         self.context = context
         self.provider_maps = provider_maps or {}
         self.alias_tokens = alias_tokens or {}
+        # Expanded values keyed by template; see expand()
+        self._expand_cache: dict[str, str] = {}
 
     def expand(self, template: str) -> str:
-        """Expand all tokens in a template string."""
+        """Expand all tokens in a template string.
+
+        Results are cached per template, except for templates using tokens
+        whose value changes between expansions (``UUID`` and ``SEQ``). Call
+        ``clear_cache()`` after changing provider maps or alias tokens.
+        """
+        if "${" not in template:
+            return template
+
+        cached = self._expand_cache.get(template)
+        if cached is not None:
+            return cached
+
         value, warnings = self.try_expand(template)
         if warnings:
             # For now, just log warnings. In the future, we might want to raise exceptions
             pass
+
+        if not any(token in template for token in _VOLATILE_TOKENS):
+            self._expand_cache[template] = value
         return value
 
+    def expand_many(self, templates: Sequence[str]) -> list[str]:
+        """Expand a batch of templates, resolving each distinct token once.
+
+        Every token appearing anywhere in the batch is looked up a single time
+        and substituted into all templates that use it. Templates using
+        volatile tokens (``UUID`` and ``SEQ``) are expanded on their own, as
+        ``expand()`` would, so each gets a fresh value.
+        """
+        needed: set[str] = set()
+        volatile: set[int] = set()
+        for index, template in enumerate(templates):
+            if "${" in template:
+                if any(token in template for token in _VOLATILE_TOKENS):
+                    volatile.add(index)
+                else:
+                    needed.update(_TOKEN_RE.findall(template))
+
+        if not needed and not volatile:
+            return list(templates)
+
+        values = {token: str(self._expand_token(token)[0]) for token in needed}
+
+        def substitute(match: re.Match[str]) -> str:
+            return values[match.group(1)]
+
+        expanded: list[str] = []
+        for index, template in enumerate(templates):
+            if index in volatile:
+                template = self.try_expand(template)[0]
+            elif "${" in template:
+                template = _TOKEN_RE.sub(substitute, template)
+            expanded.append(template)
+        return expanded
+
+    def clear_cache(self) -> None:
+        """Discard cached expansions."""
+        self._expand_cache.clear()
+
     def try_expand(self, template: str) -> tuple[str, list[str]]:
         """Expand tokens and return value with warnings."""
-        warnings = []
-        result = template
+        if "${" not in template:
+            return template, []
 
-        # Find all ${...} tokens
-        token_pattern = r"\$\{([^}]+)\}"
-        matches = re.finditer(token_pattern, result)
+        warnings: list[str] = []
+        # A token repeated within one template expands to the same value
+        values: dict[str, str] = {}
 
-        for match in matches:
+        def substitute(match: re.Match[str]) -> str:
             token_content = match.group(1)
-            expanded_value, token_warnings = self._expand_token(token_content)
-            warnings.extend(token_warnings)
-
-            # Replace the token with its expanded value
-            result = result.replace(match.group(0), str(expanded_value))
+            value = values.get(token_content)
+            if value is None:
+                expanded_value, token_warnings = self._expand_token(token_content)
+                warnings.extend(token_warnings)
+                value = values[token_content] = str(expanded_value)
+            return value
 
-        return result, warnings
+        # Substitute in a single pass so expanded values are never rescanned
+        return _TOKEN_RE.sub(substitute, template), warnings
 
     def _expand_token(self, token_content: str) -> tuple[str, list[str]]:
         """Expand a single token."""
@@ -102,7 +168,7 @@ class TokenEngine:
         if token.startswith("DATE:"):
             format_str = token[5:]
             try:
-                return self.context.now.strftime(format_str), warnings
+                return self.context.current_time().strftime(format_str), warnings
             except Exception as e:
                 warnings.append(f"Invalid date format '{format_str}': {e}")
                 return "", warnings
@@ -111,7 +177,7 @@ class TokenEngine:
         if token.startswith("TIME:"):
             format_str = token[5:]
             try:
-                return self.context.now.strftime(format_str), warnings
+                return self.context.current_time().strftime(format_str), warnings
             except Exception as e:
                 warnings.append(f"Invalid time format '{format_str}': {e}")
                 return "", warnings
@@ -1,5 +1,7 @@
 """Type definitions for the Configuration Wrapping Framework."""
 
+import re
+from collections.abc import Callable, Iterable, Mapping
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
@@ -7,6 +9,9 @@ from typing import Any
 # Constants
 MASKED_VALUE = "<masked>"
 
+# Above this many sensitive values, masking uses one combined regex
+_MASK_REGEX_THRESHOLD = 16
+
 
 # Utility functions
 def mask_sensitive_value(
@@ -29,6 +34,41 @@ def mask_sensitive_value(
     return MASKED_VALUE
 
 
+def compile_masker(values: Iterable[str]) -> Callable[[str], str]:
+    """Build a function that replaces every given value in a string with a mask.
+
+    Values are matched longest first so a secret that contains another secret
+    is masked as a whole. Large value sets are folded into a single regex so
+    each string is scanned once.
+
+    Args:
+        values: The sensitive values to mask; empty values are ignored
+
+    Returns:
+        A function mapping text to its masked form
+    """
+    sensitive = sorted({v for v in values if v}, key=len, reverse=True)
+
+    if not sensitive:
+        return unmasked
+
+    if len(sensitive) > _MASK_REGEX_THRESHOLD:
+        pattern = re.compile("|".join(map(re.escape, sensitive)))
+        return lambda text: pattern.sub(MASKED_VALUE, text)
+
+    def mask(text: str) -> str:
+        for value in sensitive:
+            text = text.replace(value, MASKED_VALUE)
+        return text
+
+    return mask
+
+
+def unmasked(text: str) -> str:
+    """Identity masker, used when there are no sensitive values."""
+    return text
+
+
 # Type aliases
 EnvMap = dict[str, str]
 ProviderMap = dict[str, str]
@@ -41,9 +81,15 @@ Errors = list[str]
 class RuntimeContext:
     """Runtime context for token expansion and provider resolution."""
 
-    env: EnvMap
-    now: datetime
+    env: Mapping[str, str]  # may be os.environ itself; copy before modifying
+    now: datetime | None  # captured on first use; see current_time()
     pid: int
     home: str
     seq: int  # incremented per invocation
     extra: dict[str, Any] = field(default_factory=dict)
+
+    def current_time(self) -> datetime:
+        """Return the invocation timestamp, capturing it on first use."""
+        if self.now is None:
+            self.now = datetime.now()
+        return self.now
@@ -10,6 +10,21 @@ from config_injector.core import build_runtime_context, load_spec
 from config_injector.models import Provider, Spec, Target
 
 
+def test_package_import_is_lazy():
+    """Test that importing the package defers heavy dependencies."""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, config_injector; "
+        "assert 'pydantic' not in sys.modules; "
+        "assert 'yaml' not in sys.modules; "
+        "assert config_injector.Spec.__name__ == 'Spec'"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True)
+    assert result.returncode == 0, result.stderr.decode()
+
+
 def test_load_spec():
     """Test loading a basic specification."""
     spec_data = {
@@ -53,6 +68,87 @@ def test_load_spec():
         spec_path.unlink()
 
 
+def test_load_spec_cache_returns_independent_copies():
+    """Test that cached specs are copied so mutations don't leak between loads."""
+    spec_yaml = """
+version: "0.1"
+configuration_providers: []
+configuration_injectors: []
+target:
+  working_dir: /tmp
+  command: ["echo", "test"]
+"""
+
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+        f.write(spec_yaml)
+        spec_path = Path(f.name)
+
+    try:
+        first = load_spec(spec_path)
+        first.env_passthrough = True
+        first.target.command.append("mutated")
+
+        second = load_spec(spec_path)
+        assert second.env_passthrough is False
+        assert second.target.command == ["echo", "test"]
+
+        # Changing the file contents must invalidate the cached parse
+        mtime_ns = spec_path.stat().st_mtime_ns
+        spec_path.write_text(spec_yaml.replace('"0.1"', '"0.2"'))
+        os.utime(spec_path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+        assert load_spec(spec_path).version == "0.2"
+    finally:
+        spec_path.unlink()
+
+
+def test_spec_command_tokens():
+    """Test that specs collect the ${...} tokens used in the command."""
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[],
+        target=Target(
+            working_dir="/tmp",
+            command=["tool", "--config", "${--config}", "${ENV:A}/${x${y}"],
+        ),
+    )
+
+    assert spec.command_tokens == frozenset({"--config", "ENV:A", "x${y", "y"})
+
+
+def test_provider_compiled_filter():
+    """Test that consecutive filter patterns of one kind share a regex."""
+    provider = Provider(
+        type="env",
+        id="env",
+        filter_chain=[
+            "APP_.*",
+            {"include": "DB_.*", "exclude": "DB_PASSWORD"},
+            {"exclude": "(?i)secret"},
+            "(X)\\1",
+            "HOME",
+        ],
+    )
+
+    steps = [
+        (include, pattern.pattern, first_chars)
+        for include, pattern, first_chars in provider.compiled_filter
+    ]
+    assert steps == [
+        (True, "(?:APP_.*)|(?:DB_.*)", frozenset("AD")),
+        # Inline global flags can't be fused, so these stay separate
+        (False, "DB_PASSWORD", frozenset("D")),
+        (False, "(?i)secret", None),
+        # Groups are kept apart so backreferences keep their numbers
+        (True, "(X)\\1", None),
+        (True, "HOME", frozenset("H")),
+    ]
+
+    # Only a required leading literal gives first characters
+    (step,) = Provider(type="env", id="env", filter_chain=["^A?B"]).compiled_filter
+    assert step[2] is None
+
+
 def test_build_runtime_context():
     """Test building runtime context."""
     context = build_runtime_context()
@@ -62,6 +158,26 @@ def test_build_runtime_context():
     assert "PATH" in context.env  # Should have environment variables
 
 
+def test_build_runtime_context_pid_after_fork():
+    """Test that contexts built in a forked child report the child's pid."""
+    if not hasattr(os, "fork"):
+        pytest.skip("os.fork is not available")
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        ok = build_runtime_context(env={}).pid == os.getpid()
+        os.write(write_fd, b"1" if ok else b"0")
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as f:
+        result = f.read()
+    os.waitpid(pid, 0)
+    assert result == b"1"
+
+
 def test_token_expansion():
     """Test basic token expansion."""
     from config_injector.core import RuntimeContext
@@ -92,6 +208,95 @@ def test_token_expansion():
     assert result == "12345"
 
 
+def test_token_expansion_captures_time_lazily():
+    """Test that the context timestamp is only captured when a token needs it."""
+    from config_injector.token_engine import TokenEngine
+
+    context = build_runtime_context(env={})
+    assert context.now is None
+
+    token_engine = TokenEngine(context)
+    assert token_engine.expand("${PID}") == str(os.getpid())
+    assert context.now is None
+
+    date = token_engine.expand("${DATE:%Y-%m-%d}")
+    assert context.now is not None
+    assert date == context.now.strftime("%Y-%m-%d")
+    assert token_engine.expand("${TIME:%f}") == context.now.strftime("%f")
+
+
+def test_token_expansion_cache():
+    """Test that expansions are cached except for per-use tokens."""
+    from config_injector.core import RuntimeContext
+    from config_injector.token_engine import TokenEngine
+
+    context = RuntimeContext(
+        env={"TEST_VAR": "first"},
+        now=None,
+        pid=12345,
+        home="/test/home",
+        seq=1,
+    )
+    token_engine = TokenEngine(context)
+
+    assert token_engine.expand("plain") == "plain"
+    assert token_engine.try_expand("plain") == ("plain", [])
+
+    # Expanded values are substituted verbatim, never rescanned for tokens
+    context.env["LITERAL"] = "${PID}"
+    assert token_engine.expand("${ENV:LITERAL}/${PID}") == "${PID}/12345"
+    assert token_engine.expand("${ENV:TEST_VAR}") == "first"
+
+    # Cached until explicitly cleared
+    context.env["TEST_VAR"] = "second"
+    assert token_engine.expand("${ENV:TEST_VAR}") == "first"
+    token_engine.clear_cache()
+    assert token_engine.expand("${ENV:TEST_VAR}") == "second"
+
+    # UUID and SEQ are never cached
+    assert token_engine.expand("${UUID}") != token_engine.expand("${UUID}")
+    assert token_engine.expand("${SEQ}") == "0001"
+    context.seq += 1
+    assert token_engine.expand("${SEQ}") == "0002"
+
+
+def test_token_expand_many():
+    """Test batch expansion matches per-string expansion."""
+    from config_injector.core import RuntimeContext
+    from config_injector.token_engine import TokenEngine
+
+    context = RuntimeContext(
+        env={"TEST_VAR": "value"},
+        now=None,
+        pid=12345,
+        home="/test/home",
+        seq=1,
+    )
+    token_engine = TokenEngine(context, alias_tokens={"--config": "/tmp/cfg.json"})
+
+    templates = [
+        "echo",
+        "${ENV:TEST_VAR}-${ENV:TEST_VAR}",
+        "--pid=${PID}",
+        "${--config}",
+        "${ENV:MISSING|fallback}",
+    ]
+    assert token_engine.expand_many(templates) == [
+        "echo",
+        "value-value",
+        "--pid=12345",
+        "/tmp/cfg.json",
+        "fallback",
+    ]
+    assert token_engine.expand_many([]) == []
+
+    # Volatile tokens get a fresh value in every template
+    first, second, seq = token_engine.expand_many(["${UUID}", "${UUID}", "${SEQ}"])
+    assert first != second
+    assert len(first) == len(second) == 36
+    assert seq == "0001"
+
+
 def test_provider_loading():
     """Test provider loading."""
     from config_injector.providers import load_providers
@@ -118,5 +323,20 @@ def test_provider_loading():
     assert len(providers["env"]) > 0  # Should have environment variables
 
 
+def test_provider_filters_compiled_once():
+    """Test that a provider compiles its filter chain once and reuses it."""
+    from config_injector.providers import EnvProvider
+
+    provider = EnvProvider(
+        Provider(type="env", id="env", filter_chain=["APP_.*", {"exclude": "APP_X"}])
+    )
+    context = build_runtime_context(env={"APP_A": "1", "APP_X": "2", "OTHER": "3"})
+
+    assert provider.load(context) == {"APP_A": "1"}
+    steps = provider._filter_steps
+    assert provider.load(context) == {"APP_A": "1"}
+    assert provider._filter_steps is steps
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
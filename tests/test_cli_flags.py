@@ -282,5 +282,49 @@ def test_json_output_without_dry_run(runner, sample_spec_file):
     assert "Warning: --json flag is ignored without --dry-run" in result.stdout
 
 
+def test_print_schema_is_cached(runner):
+    """Test that print-schema output is valid JSON and generated once."""
+    import json
+
+    from config_injector.cli import _spec_schema_json
+
+    _spec_schema_json.cache_clear()
+    first = runner.invoke(app, ["print-schema"])
+    second = runner.invoke(app, ["print-schema"])
+
+    assert first.exit_code == 0
+    assert first.stdout == second.stdout
+    assert json.loads(first.stdout)["title"] == "Spec"
+    assert _spec_schema_json.cache_info().hits == 1
+
+
+def test_dry_run_output_is_not_parsed_as_markup(runner, tmp_path):
+    """Test that dry-run output is printed verbatim rather than as Rich markup."""
+    import json
+
+    spec_file = tmp_path / "spec.yaml"
+    spec_file.write_text("""
+version: "0.1"
+configuration_providers: []
+configuration_injectors:
+  - name: tagged
+    kind: named
+    aliases: ["--tag"]
+    sources: ["[bold]value[/bold]"]
+target:
+  working_dir: "/tmp"
+  command: ["echo"]
+""")
+
+    result = runner.invoke(app, ["run", str(spec_file), "--dry-run"])
+    assert result.exit_code == 0
+    assert "[bold]value[/bold]" in result.stdout
+
+    result = runner.invoke(app, ["run", str(spec_file), "--dry-run", "--json"])
+    assert result.exit_code == 0
+    injections = json.loads(result.stdout)["injections"]
+    assert injections[0]["value"] == "[bold]value[/bold]"
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
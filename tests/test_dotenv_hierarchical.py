@@ -95,3 +95,63 @@ def test_hierarchical_dotenv_shallow_first():
         assert merged["BAR"] == "from_root"
         assert merged["BAZ"] == "from_level1"
         assert merged["QUX"] == "from_level2"
+
+
+def test_dotenv_parse_cache(monkeypatch):
+    """Test that dotenv parses are cached until the file changes."""
+    with tempfile.TemporaryDirectory() as root_dir:
+        env_file = Path(root_dir) / ".env"
+        write_env_file(env_file, "FOO=first\n")
+
+        provider = DotenvProvider(
+            Provider(type="dotenv", id="dotenv", path=str(env_file))
+        )
+        context = build_runtime_context(env={})
+
+        first = provider.load(context)
+        assert first == {"FOO": "first"}
+        first["FOO"] = "mutated"
+        assert provider.load(context) == {"FOO": "first"}
+
+        # A changed modification time invalidates the cached parse
+        mtime_ns = env_file.stat().st_mtime_ns
+        write_env_file(env_file, "FOO=second\n")
+        os.utime(env_file, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+        assert provider.load(context) == {"FOO": "second"}
+
+        # Interpolated values follow the process environment
+        write_env_file(env_file, "FOO=${DOTENV_CACHE_TEST}\n")
+        monkeypatch.setenv("DOTENV_CACHE_TEST", "one")
+        assert provider.load(context) == {"FOO": "one"}
+        monkeypatch.setenv("DOTENV_CACHE_TEST", "two")
+        assert provider.load(context) == {"FOO": "two"}
+
+        env_file.unlink()
+        assert provider.load(context) == {}
+
+
+def test_simple_dotenv_parser_matches_python_dotenv():
+    """Test that the plain KEY=value parser agrees with python-dotenv."""
+    import io
+
+    from dotenv import dotenv_values
+
+    from config_injector.providers import _parse_simple_dotenv
+
+    content = (
+        "# comment\r\n"
+        "\n"
+        "  FOO = bar  \n"
+        "EMPTY=\n"
+        "BLANK= # only a comment\n"
+        "HASH=#not-a-comment\n"
+        "INLINE=value # trailing\tcomment\n"
+        "URL=http://host/path#frag\n"
+        "FOO=override\n"
+    )
+    expected = dict(dotenv_values(stream=io.StringIO(content)))
+    assert _parse_simple_dotenv(content) == expected
+
+    # Anything beyond plain lines is left to python-dotenv
+    for content in ('Q="quoted"', "E=a\\b", "I=${HOME}", "export X=1", "NOVALUE"):
+        assert _parse_simple_dotenv(content) is None
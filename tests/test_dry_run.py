@@ -141,5 +141,73 @@ def test_dry_run_sensitive_values():
     assert "<masked>" in report.json_summary["injections"][0]["value"]
 
 
+def test_dry_run_masks_injectors_added_after_construction():
+    """Test that sensitive injectors appended to a spec are still masked."""
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[],
+        target=Target(working_dir="/tmp", command=["tool"]),
+    )
+    spec.configuration_injectors.append(
+        Injector(
+            name="token",
+            kind="named",
+            aliases=["--token"],
+            connector="=",
+            sources=["s3cr3t"],
+            sensitive=True,
+        )
+    )
+
+    report = dry_run(spec, build_runtime_context())
+
+    assert "s3cr3t" not in report.text_summary
+    assert "s3cr3t" not in str(report.json_summary)
+
+
+def test_dry_run_loads_providers_once(monkeypatch):
+    """Test that dry-run reuses its token engine instead of reloading providers."""
+    import config_injector.providers as providers_module
+
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[Provider(type="env", id="env")],
+        configuration_injectors=[
+            Injector(
+                name="test_var",
+                kind="env_var",
+                aliases=["TEST_VAR"],
+                sources=["test_value"],
+            )
+        ],
+        target=Target(working_dir="/tmp", command=["echo", "${ENV:HOME}"]),
+    )
+
+    calls = []
+    original_load_providers = providers_module.load_providers
+
+    def counting_load_providers(*args, **kwargs):
+        calls.append(args)
+        return original_load_providers(*args, **kwargs)
+
+    monkeypatch.setattr(providers_module, "load_providers", counting_load_providers)
+
+    report = dry_run(spec, build_runtime_context())
+
+    assert len(calls) == 1
+    assert report.build.argv[0] == "echo"
+
+    # Callers holding loaded providers can pass them without a token engine
+    from config_injector.core import build_env_and_argv
+
+    context = build_runtime_context(env={"HOME": "/test/home"})
+    build = build_env_and_argv(
+        spec, [], context, providers={"env": {"HOME": "/test/home"}}
+    )
+    assert len(calls) == 1
+    assert build.argv == ["echo", "/test/home"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
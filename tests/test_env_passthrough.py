@@ -39,6 +39,9 @@ def test_env_passthrough_overlay():
     # Verify that the injector value wins over the passthrough value
     assert dry_run_result.build.env["TEST_VAR"] == "injector_value"
 
+    # The runtime context's environment must not be modified
+    assert custom_env["TEST_VAR"] == "passthrough_value"
+
 
 def test_env_passthrough_disabled():
     """Test that when env_passthrough is disabled, only injector values are in the environment."""
@@ -74,5 +77,57 @@ def test_env_passthrough_disabled():
     assert "OTHER_VAR" not in dry_run_result.build.env
 
 
+def test_env_passthrough_without_env_injectors_reuses_environment():
+    """Test that the inherited environment is not copied when left untouched."""
+    custom_env = {"TEST_VAR": "passthrough_value"}
+
+    spec = Spec(
+        version="0.1",
+        env_passthrough=True,
+        configuration_providers=[],
+        configuration_injectors=[
+            Injector(
+                name="test_flag",
+                kind="named",
+                aliases=["--flag"],
+                sources=["value"],
+            )
+        ],
+        target=Target(working_dir="/tmp", command=["echo", "test"]),
+    )
+
+    context = build_runtime_context(env=custom_env)
+    dry_run_result = dry_run(spec, context)
+
+    assert dry_run_result.build.env == {"TEST_VAR": "passthrough_value"}
+    assert dry_run_result.build.env is context.env
+
+
+def test_runtime_context_reads_process_environment_without_copying():
+    """Test that the default context reads os.environ and never modifies it."""
+    context = build_runtime_context()
+    assert context.env is os.environ
+
+    spec = Spec(
+        version="0.1",
+        env_passthrough=True,
+        configuration_providers=[],
+        configuration_injectors=[
+            Injector(
+                name="test_env_var",
+                kind="env_var",
+                aliases=["CONFIG_INJECTOR_TEST_VAR"],
+                sources=["injector_value"],
+            )
+        ],
+        target=Target(working_dir="/tmp", command=["echo", "test"]),
+    )
+
+    dry_run_result = dry_run(spec, context)
+
+    assert dry_run_result.build.env["CONFIG_INJECTOR_TEST_VAR"] == "injector_value"
+    assert "CONFIG_INJECTOR_TEST_VAR" not in os.environ
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -66,6 +66,40 @@ def test_file_cleanup_after_execution():
     assert not file_path.exists()
 
 
+def test_file_cleanup_when_command_fails_to_start():
+    """Test that temporary files are removed even if the command can't start."""
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[
+            Injector(
+                name="test_file",
+                kind="file",
+                aliases=["--config"],
+                sources=["test_content"],
+            )
+        ],
+        target=Target(working_dir="/tmp", command=["/nonexistent/command"]),
+    )
+
+    context = build_runtime_context()
+    providers = load_providers(spec, context)
+    token_engine = TokenEngine(context, providers)
+    resolved_injectors = [
+        resolve_injector(injector, context, providers, token_engine)
+        for injector in spec.configuration_injectors
+    ]
+    file_path = resolved_injectors[0].files_created[0]
+
+    from config_injector.core import build_env_and_argv
+
+    build = build_env_and_argv(spec, resolved_injectors, context)
+    result = execute(spec, build, StreamWriter(), resolved_injectors, context)
+
+    assert result.exit_code == 1
+    assert not file_path.exists()
+
+
 def test_stdin_fragment_cleanup_after_execution():
     """Test that stdin fragments are cleaned up after execution."""
     # Create a minimal spec with stdin fragments
@@ -395,5 +429,145 @@ def test_execution_result_json_format_paths():
         stream_writer.close()
 
 
+def test_execution_drains_stderr_without_stdout_output():
+    """Test that a child flooding stderr is not blocked waiting on stdout."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stdout_path = Path(tmpdir) / "stdout.log"
+        stderr_path = Path(tmpdir) / "stderr.log"
+
+        # Write more than a pipe buffer to stderr before touching stdout
+        spec = Spec(
+            version="0.1",
+            configuration_providers=[],
+            configuration_injectors=[],
+            target=Target(
+                working_dir="/tmp",
+                command=[
+                    "sh",
+                    "-c",
+                    "head -c 200000 /dev/zero | tr '\\0' x >&2; echo done",
+                ],
+            ),
+        )
+
+        context = build_runtime_context()
+
+        from config_injector.core import build_env_and_argv
+
+        build = build_env_and_argv(spec, [], context)
+
+        stream_writer = StreamWriter(
+            StreamConfig(
+                path=stdout_path, tee_terminal=False, append=False, format="text"
+            ),
+            StreamConfig(
+                path=stderr_path, tee_terminal=False, append=False, format="text"
+            ),
+        )
+
+        result = execute(spec, build, stream_writer, [], context)
+        stream_writer.close()
+
+        assert result.exit_code == 0
+        assert stdout_path.read_text() == "done\n"
+        assert stderr_path.read_text() == "x" * 200000
+
+
+def test_execution_streams_large_stdin():
+    """Test that stdin larger than the pipe buffer is fed without deadlocking."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stdout_path = Path(tmpdir) / "stdout.log"
+        payload = "y" * 300000
+
+        spec = Spec(
+            version="0.1",
+            configuration_providers=[],
+            configuration_injectors=[
+                Injector(name="payload", kind="stdin_fragment", sources=[payload])
+            ],
+            target=Target(working_dir="/tmp", command=["cat"]),
+        )
+
+        context = build_runtime_context()
+        providers = load_providers(spec, context)
+        token_engine = TokenEngine(context, providers)
+        resolved_injectors = [
+            resolve_injector(injector, context, providers, token_engine)
+            for injector in spec.configuration_injectors
+        ]
+
+        from config_injector.core import build_env_and_argv
+
+        build = build_env_and_argv(spec, resolved_injectors, context)
+
+        stream_writer = StreamWriter(
+            StreamConfig(
+                path=stdout_path, tee_terminal=False, append=False, format="text"
+            )
+        )
+
+        result = execute(spec, build, stream_writer, resolved_injectors, context)
+        stream_writer.close()
+
+        assert result.exit_code == 0
+        assert stdout_path.read_text() == payload
+
+
+def test_shell_target_runs_argv_directly(tmp_path):
+    """Test that shell targets never pass expanded values through a shell."""
+    marker = tmp_path / "pwned"
+    stdout_path = tmp_path / "stdout.log"
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[],
+        target=Target(
+            working_dir="/tmp",
+            shell="bash",
+            command=["echo", "${ENV:FOO}", "|", "cat"],
+        ),
+    )
+
+    context = build_runtime_context(env={"FOO": f"x; touch {marker}"})
+
+    from config_injector.core import build_env_and_argv
+
+    build = build_env_and_argv(spec, [], context)
+    stream_writer = StreamWriter(
+        StreamConfig(path=stdout_path, tee_terminal=False, append=False, format="text")
+    )
+    result = execute(spec, build, stream_writer, [], context)
+    stream_writer.close()
+
+    assert result.exit_code == 0
+    assert not marker.exists()
+    assert stdout_path.read_text() == f"x; touch {marker} | cat\n"
+
+
+def test_execution_without_forwarded_streams():
+    """Test that output nobody consumes is discarded without being read."""
+    writer = StreamWriter()
+    assert not writer.forwards_stdout
+    assert not writer.forwards_stderr
+
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[],
+        target=Target(
+            working_dir="/tmp",
+            command=["sh", "-c", "head -c 200000 /dev/zero; echo oops >&2"],
+        ),
+    )
+
+    from config_injector.core import build_env_and_argv
+
+    context = build_runtime_context()
+    build = build_env_and_argv(spec, [], context)
+    result = execute(spec, build, writer, [], context)
+
+    assert result.exit_code == 0
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -6,7 +6,9 @@ from config_injector.expression_parser import (
     ExpressionError,
     ExpressionLexer,
     TokenType,
+    compile_expression,
     evaluate_expression,
+    evaluate_expression_batch,
     parse_expression,
 )
 
@@ -86,6 +88,13 @@ class TestExpressionLexer:
         assert tokens[1].type == TokenType.STRING
         assert tokens[1].value == "it's great"
 
+    def test_tokenize_string_keeps_other_backslashes(self):
+        """Test that backslashes before other characters are kept as written."""
+        tokens = ExpressionLexer(r'v =~ "^\d+\.\\\d$"').tokenize()
+
+        assert tokens[2].type == TokenType.STRING
+        assert tokens[2].value == r"^\d+\.\\d$"
+
     def test_tokenize_negative_numbers(self):
         """Test tokenizing negative numbers."""
         lexer = ExpressionLexer("-42 -3.14")
@@ -109,6 +118,22 @@ class TestExpressionLexer:
         with pytest.raises(ExpressionError, match="Unexpected character '@'"):
             lexer.tokenize()
 
+    def test_iter_tokens_is_lazy(self):
+        """Test that tokens are produced on demand."""
+        tokens = ExpressionLexer("a == 1 @").iter_tokens()
+
+        assert next(tokens).value == "a"
+        assert next(tokens).value == "=="
+        assert next(tokens).value == "1"
+        with pytest.raises(ExpressionError, match="Unexpected character '@'"):
+            next(tokens)
+
+    def test_tokenize_error_unknown_operator(self):
+        """Test error on a lone operator character."""
+        lexer = ExpressionLexer("a = b")
+        with pytest.raises(ExpressionError, match="Unknown operator '=' at position 2"):
+            lexer.tokenize()
+
 
 class TestExpressionParser:
     """Tests for the expression parser."""
@@ -129,10 +154,14 @@ class TestExpressionParser:
         # Number literal
         ast = parse_expression("42")
         assert ast.evaluate({}) == 42
+        assert type(ast.evaluate({})) is int
 
         ast = parse_expression("3.14")
         assert ast.evaluate({}) == 3.14
 
+        ast = parse_expression("-2.")
+        assert type(ast.evaluate({})) is float
+
     def test_parse_identifier(self):
         """Test parsing identifiers."""
         ast = parse_expression("myvar")
@@ -253,6 +282,79 @@ class TestExpressionParser:
         context = {"status": "inactive", "count": 3, "debug": False, "production": True}
         assert ast.evaluate(context) is False
 
+    def test_parse_builds_specialized_nodes(self):
+        """Test that the parser emits a node class per operator kind."""
+        from config_injector.expression_parser import (
+            AndNode,
+            ComparisonNode,
+            NotNode,
+            OrNode,
+            RegexMatchNode,
+        )
+
+        ast = parse_expression("a == 1 OR NOT b =~ 'x' && c")
+        assert isinstance(ast, OrNode)
+        assert isinstance(ast.left, ComparisonNode)
+        assert isinstance(ast.right, AndNode)
+        assert isinstance(ast.right.left, NotNode)
+        assert isinstance(ast.right.left.operand, RegexMatchNode)
+
+        # Nodes use slots rather than a per-instance __dict__
+        assert not hasattr(ast, "__dict__")
+        assert not hasattr(ast.right.left.operand.left, "__dict__")
+
+    def test_parse_folds_constant_subtrees(self):
+        """Test that context-independent subtrees are evaluated at parse time."""
+        from config_injector.expression_parser import LiteralNode
+
+        ast = parse_expression("'prod' == 'prod' AND 1 < 2")
+        assert isinstance(ast, LiteralNode)
+        assert ast.value is True
+
+        # Short-circuited branches never reach the variable
+        assert isinstance(parse_expression("false AND missing"), LiteralNode)
+
+        ast = parse_expression("env == 'prod' OR NOT true")
+        assert isinstance(ast.right, LiteralNode)
+        assert ast.evaluate({"env": "prod"}) is True
+        assert ast.evaluate({"env": "dev"}) is False
+
+    def test_parse_shares_equal_subtrees(self):
+        """Test that structurally equal subtrees are a single node."""
+        first = parse_expression('env == "prod" OR debug')
+        second = parse_expression('(env == "prod") AND NOT debug')
+
+        assert first.left is second.left
+        assert first.right is second.right.operand
+        # Literals of equal value but different type stay distinct
+        assert (
+            parse_expression("x == 1").right is not parse_expression("x == true").right
+        )
+
+    def test_folding_does_not_modify_shared_nodes(self):
+        """Test that folding rebuilds nodes instead of changing shared ones."""
+        from config_injector.expression_parser import (
+            _SHARED_NODES,
+            BinaryOpNode,
+            LiteralNode,
+            UnaryOpNode,
+        )
+
+        ast = parse_expression("env == 'prod' OR (NOT (1 > 2) AND debug)")
+        assert isinstance(ast.right.left, LiteralNode)
+
+        for key, node in list(_SHARED_NODES.items()):
+            if isinstance(node, BinaryOpNode):
+                assert key == (node.operator, node.left, node.right)
+            elif isinstance(node, UnaryOpNode):
+                assert key == (node.operator, node.operand)
+
+    def test_parse_is_cached(self):
+        """Test that parsing the same expression returns the cached tree."""
+        first = parse_expression("env == 'prod' AND debug != true")
+        assert parse_expression("env == 'prod' AND debug != true") is first
+        assert parse_expression("env == 'dev'") is not first
+
     def test_parse_error_unexpected_token(self):
         """Test parse error on unexpected token."""
         with pytest.raises(ExpressionError, match="Unexpected token"):
@@ -285,6 +387,16 @@ class TestExpressionEvaluation:
         ast = parse_expression('"10" > y')
         assert ast.evaluate({"y": 5}) is True
 
+    def test_comparison_coercion_follows_operand_types(self):
+        """Test that a node re-plans coercion when operand types change."""
+        ast = parse_expression("value > 5")
+
+        assert ast.evaluate({"value": "10"}) is True
+        assert ast.evaluate({"value": "10"}) is True
+        assert ast.evaluate({"value": 3}) is False
+        assert ast.evaluate({"value": "abc"}) is True  # "abc" > "5" as strings
+        assert ast.evaluate({"value": None}) is True  # "None" > "5" as strings
+
     def test_type_coercion_fallback_to_string(self):
         """Test fallback to string comparison."""
         ast = parse_expression('"abc" > "def"')
@@ -343,6 +455,108 @@ class TestExpressionEvaluation:
             ast = parse_expression('"test" =~ "["')
             ast.evaluate({})
 
+    def test_regex_patterns_are_compiled_once(self):
+        """Test that regex patterns are compiled once and reused."""
+        from config_injector.expression_parser import _compile_regex
+
+        _compile_regex.cache_clear()
+        ast = parse_expression('name =~ "^svc-[0-9]+$"')
+        assert ast.evaluate({"name": "svc-1"}) is True
+        assert ast.evaluate({"name": "svc-x"}) is False
+        assert ast.evaluate({"name": 42}) is False
+        assert _compile_regex.cache_info().misses == 1
+
+    def test_variable_regex_patterns_are_compiled_once(self):
+        """Test that variable patterns reuse their compile but not match results."""
+        from config_injector.expression_parser import _compile_regex
+
+        _compile_regex.cache_clear()
+        ast = parse_expression("host =~ host_pattern")
+        context = {"host": "db-01", "host_pattern": "^db-"}
+        assert ast.evaluate(context) is True
+        assert ast.evaluate(context) is True
+        assert ast.evaluate({"host": "web-01", "host_pattern": "^db-"}) is False
+        info = _compile_regex.cache_info()
+        assert (info.hits, info.misses) == (2, 1)
+
+        with pytest.raises(ExpressionError, match="Invalid regex pattern"):
+            ast.evaluate({"host": "db-01", "host_pattern": "["})
+
+    def test_literal_regex_is_compiled_at_parse_time(self):
+        """Test that a literal pattern is compiled once when parsing."""
+        ast = parse_expression('branch !~ "^release/"')
+        assert ast._pattern is not None
+        assert ast.evaluate({"branch": "main"}) is True
+        assert ast.evaluate({"branch": "release/1.0"}) is False
+
+        # Patterns from variables are still compiled on evaluation
+        ast = parse_expression("branch =~ pattern")
+        assert ast._pattern is None
+        assert ast.evaluate({"branch": "main", "pattern": "^ma"}) is True
+
+    def test_compile_expression(self):
+        """Test compiling an expression into a cached truth function."""
+        evaluate = compile_expression('stage == "prod" AND enabled')
+        assert compile_expression('stage == "prod" AND enabled') is evaluate
+        assert evaluate({"stage": "prod", "enabled": "on"}) is True
+        assert evaluate({"stage": "prod", "enabled": "off"}) is False
+
+        # Results are coerced to booleans like evaluate_expression
+        assert compile_expression("flag")({"flag": "yes"}) is True
+
+        with pytest.raises(ExpressionError, match="Unexpected token"):
+            compile_expression("a ==")
+
+    def test_evaluate_expression_batch(self):
+        """Test evaluating one expression against several contexts."""
+        contexts = [
+            {"n": "3", "env": "prod"},
+            {"n": "12", "env": "prod"},
+            {"n": "12", "env": "dev"},
+        ]
+        assert evaluate_expression_batch('n > 5 AND env == "prod"', contexts) == [
+            False,
+            True,
+            False,
+        ]
+        assert evaluate_expression_batch("n > 5", []) == []
+
+        with pytest.raises(ExpressionError, match="Undefined variable: missing"):
+            evaluate_expression_batch("missing", [{}])
+
+    def test_compiled_expression_matches_evaluate(self):
+        """Test that compiled trees agree with walking the AST."""
+        expressions = [
+            'env == "prod" AND count > 5',
+            'NOT (env =~ "^dev") || flag',
+            "branch !~ pattern",
+            "count >= 10 OR flag",
+        ]
+        contexts = [
+            {
+                "env": "prod",
+                "count": "12",
+                "flag": "no",
+                "branch": "main",
+                "pattern": "^m",
+            },
+            {"env": "dev", "count": "3", "flag": True, "branch": "x", "pattern": "^m"},
+        ]
+        for expression in expressions:
+            ast = parse_expression(expression)
+            compiled = ast.compile()
+            assert ast.compile() is compiled
+            for context in contexts:
+                assert compiled(context) == ast.evaluate(context)
+
+        with pytest.raises(ExpressionError, match="Undefined variable: missing"):
+            parse_expression("count >= 10 OR missing").compile()({"count": "1"})
+
+    def test_deeply_nested_expression_falls_back_to_evaluate(self):
+        """Test expressions too deep for the Python compiler still evaluate."""
+        expression = " AND ".join(["flag"] * 400)
+        assert evaluate_expression(expression, {"flag": "yes"}) is True
+
     def test_empty_expression_error(self):
         """Test error on empty expression."""
         with pytest.raises(ExpressionError, match="Empty expression"):
@@ -1,6 +1,11 @@
 """Tests for the Configuration Wrapping Framework injectors."""
 
+import os
+import secrets
+import tempfile
+
 import pytest
+from pydantic import ValidationError
 
 from config_injector.core import build_runtime_context, dry_run
 from config_injector.injectors import resolve_injector
@@ -85,7 +90,7 @@ def test_named_injector():
     # Verify
     assert resolved.value == "test_value"
     assert resolved.applied_aliases == ["--test"]
-    assert resolved.argv_segments == ["--test=test_value"]
+    assert resolved.argv_segments == ("--test=test_value",)
     assert not resolved.env_updates
     assert not resolved.files_created
     assert not resolved.skipped
@@ -121,7 +126,7 @@ def test_positional_injector():
     # Verify
     assert resolved.value == "test_value"
     assert not resolved.applied_aliases
-    assert resolved.argv_segments == ["test_value"]
+    assert resolved.argv_segments == ("test_value",)
     assert not resolved.env_updates
     assert not resolved.files_created
     assert not resolved.skipped
@@ -254,5 +259,163 @@ def test_conditional_stdin_fragment_injector():
     assert b"fragment2" not in dry_run_result.build.stdin_data
 
 
+def test_injection_plan():
+    """Test that injectors carry a plan specialised to their settings."""
+    named = Injector(name="n", kind="named", aliases=["--port"], connector="space")
+    assert named.plan.build_argv("80") == ("--port", "80")
+    assert named.plan.build_env("80") == {}
+    assert named.plan.coerce is None
+
+    env_var = Injector(name="e", kind="env_var", aliases=["A", "B"], type="bool")
+    assert env_var.plan.build_env("x") == {"A": "x", "B": "x"}
+    assert env_var.plan.coerce("yes") == ("true", [])
+
+    # Constant defaults without sources are resolved up front
+    assert Injector(name="d", kind="env_var", default=8080).plan.static_value == "8080"
+    assert (
+        Injector(name="d", kind="env_var", default="${HOME}").plan.static_value is None
+    )
+    assert (
+        Injector(name="d", kind="env_var", sources=["x"], default="y").plan.static_value
+        is None
+    )
+
+    # and coerced then, except paths and defaults that fail coercion
+    def static(**settings):
+        return Injector(name="d", kind="env_var", **settings).plan.static_value
+
+    assert static(type="bool", default="yes") == "true"
+    assert static(type="path", default="/") is None
+    assert static(type="int", default="x") is None
+
+    # Defaults are stringified once and only expanded when they hold tokens
+    templated = Injector(name="d", kind="env_var", sources=["x"], default="${HOME}")
+    assert templated.plan.default_value == "${HOME}"
+    assert templated.plan.default_needs_expand is True
+    assert Injector(name="d", kind="env_var", default=3).plan.default_value == "3"
+
+    # Plans do not affect model equality
+    assert named == Injector(
+        name="n", kind="named", aliases=["--port"], connector="space"
+    )
+    assert named != Injector(name="n", kind="named", aliases=["--port"])
+
+    # Injectors are frozen so their plan cannot go stale
+    with pytest.raises(ValidationError):
+        named.connector = "="
+
+
+def test_eval_context_built_once_per_run(monkeypatch):
+    """Test that 'when' variables are flattened once for all injectors."""
+    import config_injector.core as core_module
+    from config_injector.injectors import build_eval_context
+
+    context = build_runtime_context(env={"STAGE": "prod"})
+    eval_context = build_eval_context(context, {"cfg": {"region": "eu"}})
+    assert eval_context["STAGE"] == "prod"
+    assert eval_context["region"] == "eu"
+    assert eval_context["cfg_region"] == "eu"
+    assert eval_context["PID"] == str(context.pid)
+
+    calls = []
+
+    def counting_build_eval_context(*args):
+        calls.append(args)
+        return build_eval_context(*args)
+
+    monkeypatch.setattr(core_module, "build_eval_context", counting_build_eval_context)
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[
+            Injector(
+                name=f"i{n}",
+                kind="env_var",
+                aliases=[f"V{n}"],
+                sources=["x"],
+                when='STAGE == "prod"',
+            )
+            for n in range(3)
+        ],
+        target=Target(working_dir="/tmp", command=["echo"]),
+    )
+    report = dry_run(spec, context)
+
+    assert len(calls) == 1
+    assert not any(r.skipped for r in report.resolved)
+
+
+def test_create_temp_file_accepts_bytes():
+    """Test that file contents may be given as text or bytes."""
+    from config_injector.injectors import _create_temp_file
+
+    injector = Injector(name="cfg", kind="file", type="path")
+    text_file = _create_temp_file('{"a": "é"}', injector)
+    bytes_file = _create_temp_file(b'["raw"]', injector)
+    plain_file = _create_temp_file(b"raw", injector)
+    indented_file = _create_temp_file('\n  {"a": 1}', injector)
+    try:
+        assert text_file.suffix == ".json"
+        assert text_file.read_text(encoding="utf-8") == '{"a": "é"}'
+        assert bytes_file.suffix == ".json"
+        assert bytes_file.read_bytes() == b'["raw"]'
+        assert plain_file.suffix == ".tmp"
+        assert indented_file.suffix == ".json"
+    finally:
+        for path in (text_file, bytes_file, plain_file, indented_file):
+            path.unlink()
+
+
+def test_condition_fallback_is_logged(caplog):
+    """Test that falling back to simple condition evaluation logs a warning."""
+    context = build_runtime_context(env={})
+    injector = Injector(
+        name="i", kind="env_var", aliases=["V"], sources=["x"], when="(true"
+    )
+
+    with caplog.at_level("WARNING", logger="config_injector.injectors"):
+        resolved = resolve_injector(injector, context, {}, TokenEngine(context))
+
+    assert resolved.skipped is False
+    assert "falling back to simple evaluation" in caplog.text
+
+
+def test_create_temp_file_skips_existing_names(monkeypatch, tmp_path):
+    """Test that temp files never reuse an existing path."""
+    import config_injector.injectors as injectors_module
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    names = iter(["taken", "free"])
+    monkeypatch.setattr(secrets, "token_hex", lambda _nbytes: next(names))
+    taken = tmp_path / "config_injector_taken.tmp"
+    taken.write_text("keep")
+
+    injector = Injector(name="cfg", kind="file")
+    path = injectors_module._create_temp_file("value", injector)
+
+    assert path == tmp_path / "config_injector_free.tmp"
+    assert path.read_text() == "value"
+    assert taken.read_text() == "keep"
+    if os.name == "posix":
+        assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_create_temp_file_removes_partial_file(monkeypatch, tmp_path):
+    """Test that a failed write does not leave the temp file behind."""
+    import config_injector.injectors as injectors_module
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    def failing_write(*_args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(os, "write", failing_write)
+    injector = Injector(name="cfg", kind="file")
+
+    with pytest.raises(OSError, match="No space left"):
+        injectors_module._create_temp_file("value", injector)
+    assert list(tmp_path.iterdir()) == []
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
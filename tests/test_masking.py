@@ -639,6 +639,122 @@ def test_multiple_overlapping_sensitive_values():
     assert "abc123def" not in dry_run_result.text_summary
     assert MASKED_VALUE in dry_run_result.text_summary
 
+    # The longest secret is masked as a whole rather than piecewise
+    assert f"Command: echo {MASKED_VALUE}" in dry_run_result.text_summary
+
+
+def test_many_sensitive_values_masking():
+    """Test masking when enough secrets exist to use the combined regex."""
+    secrets = [f"secret-{i:02d}" for i in range(20)]
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[
+            Injector(
+                name=f"secret_{i}",
+                kind="env_var",
+                aliases=[f"SECRET_{i}"],
+                sources=[secret],
+                sensitive=True,
+            )
+            for i, secret in enumerate(secrets)
+        ],
+        target=Target(
+            working_dir="/tmp", command=["echo", "secret-07+secret-19", "x.*"]
+        ),
+    )
+
+    dry_run_result = dry_run(spec, build_runtime_context())
+
+    for secret in secrets:
+        assert secret not in dry_run_result.text_summary
+    assert (
+        f"Command: echo {MASKED_VALUE}+{MASKED_VALUE} x.*"
+        in dry_run_result.text_summary
+    )
+
+
+def test_json_summary_argv_masking():
+    """Test that sensitive values are masked in the JSON summary's argv."""
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[
+            Injector(
+                name="api_key",
+                kind="named",
+                aliases=["--api-key"],
+                sources=["secret_api_key"],
+                sensitive=True,
+            )
+        ],
+        target=Target(working_dir="/tmp", command=["curl"]),
+    )
+
+    report = dry_run(spec, build_runtime_context())
+
+    assert "secret_api_key" in " ".join(report.build.argv)
+    assert report.json_summary["build"]["argv"] == ["curl", f"--api-key={MASKED_VALUE}"]
+    assert f"Command: curl --api-key={MASKED_VALUE}" in report.text_summary
+
+
+def test_json_summary_embedded_value_masking():
+    """Test that secrets embedded in non-sensitive values are masked in JSON."""
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[
+            Injector(
+                name="password",
+                kind="env_var",
+                aliases=["DB_PASSWORD"],
+                sources=["hunter2"],
+                sensitive=True,
+            ),
+            Injector(
+                name="dsn",
+                kind="env_var",
+                aliases=["DB_DSN"],
+                sources=["postgres://app:hunter2@db/app"],
+            ),
+        ],
+        target=Target(working_dir="/tmp", command=["echo"]),
+    )
+
+    report = dry_run(spec, build_runtime_context())
+    values = {i["name"]: i["value"] for i in report.json_summary["injections"]}
+
+    assert values["password"] == MASKED_VALUE
+    assert values["dsn"] == f"postgres://app:{MASKED_VALUE}@db/app"
+
+
+def test_masking_decided_from_resolved_values():
+    """Test that sensitive injectors without a value leave output unmasked."""
+    from config_injector.types import compile_masker, unmasked
+
+    assert compile_masker([]) is unmasked
+    assert compile_masker(["", ""]) is unmasked
+
+    spec = Spec(
+        version="0.1",
+        configuration_providers=[],
+        configuration_injectors=[
+            Injector(
+                name="token",
+                kind="env_var",
+                aliases=["TOKEN"],
+                sources=["${ENV:MISSING_TOKEN}"],
+                sensitive=True,
+            )
+        ],
+        target=Target(working_dir="/tmp", command=["echo", "plain"]),
+    )
+
+    report = dry_run(spec, build_runtime_context(env={}))
+
+    assert report.json_summary["build"]["argv"] == ["echo", "plain"]
+    assert MASKED_VALUE not in report.text_summary
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -279,5 +279,37 @@ def test_stream_writer_json_format():
             writer.close()
 
 
+def test_stream_writer_json_format_multiple_lines():
+    """Test that each non-blank line of a chunk becomes one JSON record."""
+    import json
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        temp_file = Path(tmpdir) / "test.log"
+        config = StreamConfig(
+            path=temp_file, tee_terminal=False, append=False, format="json"
+        )
+        writer = StreamWriter(stderr_config=config)
+
+        try:
+            writer.write_stderr(b"first\n\n  second  \nthird")
+            writer.close()
+
+            records = [json.loads(line) for line in temp_file.read_text().splitlines()]
+            assert [r["msg"] for r in records] == ["first", "second", "third"]
+            assert {r["stream"] for r in records} == {"stderr"}
+        finally:
+            writer.close()
+
+
+def test_stream_writer_masks_overlapping_values():
+    """Test that a secret containing another secret is masked as a whole."""
+    writer = StreamWriter()
+    writer.register_sensitive_values(["token"])
+    writer.register_sensitive_values(["token-extended"])
+
+    assert writer._mask_sensitive_data("a token-extended b") == "a <masked> b"
+    assert writer._mask_sensitive_data("plain") == "plain"
+
+
 if __name__ == "__main__":
     pytest.main([__file__])